@@ -6,7 +6,7 @@ from typing import Dict, List, Tuple, Iterable, Optional
 from django.db.models import Q
 from django.utils import timezone
 
-from sharing.models import ShareEvent, ShareLink, LinkVisit
+from sharing.models import LinkSession, ShareEvent
 from accounts.models import Doctor
 from clinics.models import Clinic
 from campaigns.models import Campaign, DoctorCampaign
@@ -28,15 +28,32 @@ def _shares_in_window(win: Window):
             .select_related("doctor", "clinic")
             .filter(created_at__gte=win.start, created_at__lte=win.end))
 
-def _clicked_links_in_window(win: Window, link_ids: Iterable[int]):
-    if not link_ids:
-        return set()
-    qs = (LinkVisit.objects
-          .filter(share_link_id__in=list(link_ids),
-                  created_at__gte=win.start, created_at__lte=win.end)
-          .values_list("share_link_id", flat=True)
-          .distinct())
-    return set(qs)
+_CLICK_FIELDS = ("share_link__first_visit_at", "share_link__last_visit_at")
+
+def _clicked_links_in_window(win: Window, shares: Iterable[dict]) -> set:
+    """
+    share_link ids visited inside the window. The ShareLink first/last visit counters
+    settle most shares without a query: never visited, visited only outside the window,
+    or first/last visit inside it. Links visited both before and after the window are
+    checked against their LinkSession rows, the finest grain kept: a session that
+    straddles a window edge counts as a visit inside it.
+    """
+    clicked, straddling = set(), []
+    for s in shares:
+        first, last = s["share_link__first_visit_at"], s["share_link__last_visit_at"]
+        if first is None or first > win.end or last < win.start:
+            continue
+        if first >= win.start or last <= win.end:
+            clicked.add(s["share_link_id"])
+        else:
+            straddling.append(s["share_link_id"])
+    if straddling:
+        clicked.update(LinkSession.objects
+                       .filter(share_link_id__in=straddling,
+                               started_at__lte=win.end, last_seen_at__gte=win.start)
+                       .values_list("share_link_id", flat=True)
+                       .distinct())
+    return clicked
 
 def _brand_for_share_on_date(doctor_id: int, on_date: date) -> List[Brand]:
     """
@@ -53,10 +70,9 @@ def _brand_for_share_on_date(doctor_id: int, on_date: date) -> List[Brand]:
 
 def shares_by_doctor(win: Window):
     shares = list(_shares_in_window(win)
-                  .values("id", "doctor_id", "doctor__full_name", "clinic_id", "clinic__name", "share_link_id", "created_at"))
-
-    link_ids = [s["share_link_id"] for s in shares]
-    clicked = _clicked_links_in_window(win, link_ids)
+                  .values("id", "doctor_id", "doctor__full_name", "clinic_id", "clinic__name", "share_link_id", "created_at",
+                          *_CLICK_FIELDS))
+    clicked = _clicked_links_in_window(win, shares)
 
     agg = defaultdict(lambda: {"doctor_name": "", "clinic_name": "", "shares": 0, "clicked": 0})
     for s in shares:
@@ -90,10 +106,8 @@ def shares_by_doctor(win: Window):
 
 def shares_by_clinic(win: Window):
     shares = list(_shares_in_window(win)
-                  .values("id", "clinic_id", "clinic__name", "share_link_id"))
-
-    link_ids = [s["share_link_id"] for s in shares]
-    clicked = _clicked_links_in_window(win, link_ids)
+                  .values("id", "clinic_id", "clinic__name", "share_link_id", *_CLICK_FIELDS))
+    clicked = _clicked_links_in_window(win, shares)
 
     agg = defaultdict(lambda: {"clinic_name": "", "shares": 0, "clicked": 0})
     for s in shares:
@@ -125,10 +139,8 @@ def shares_by_clinic(win: Window):
 def shares_by_brand(win: Window):
     # We project each share to zero/one/many brands based on active tags at share time
     se = list(_shares_in_window(win)
-              .values("id", "doctor_id", "share_link_id", "created_at"))
-
-    link_ids = [s["share_link_id"] for s in se]
-    clicked = _clicked_links_in_window(win, link_ids)
+              .values("id", "doctor_id", "share_link_id", "created_at", *_CLICK_FIELDS))
+    clicked = _clicked_links_in_window(win, se)
 
     agg = defaultdict(lambda: {"shares": 0, "clicked": 0})
     brand_names = {}  # brand_id -> name
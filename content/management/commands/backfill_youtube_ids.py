@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from content.models import VideoI18n
+from content.validators import parse_youtube_id
+
+class Command(BaseCommand):
+    help = "Populate VideoI18n.youtube_id from youtube_url for rows saved before the field existed (or all with --all)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-parse every row, not just empty ones")
+        parser.add_argument("--batch", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        qs = VideoI18n.objects.order_by("id")
+        if not opts["all"]:
+            qs = qs.filter(youtube_id="")
+
+        changed, unparsable, batch = 0, 0, []
+        for row in qs.only("id", "youtube_url", "youtube_id").iterator(chunk_size=opts["batch"]):
+            vid = parse_youtube_id(row.youtube_url) or ""
+            if not vid:
+                unparsable += 1
+            if vid != row.youtube_id:
+                row.youtube_id = vid
+                batch.append(row)
+            if len(batch) >= opts["batch"]:
+                VideoI18n.objects.bulk_update(batch, ["youtube_id"])
+                changed += len(batch)
+                batch = []
+        if batch:
+            VideoI18n.objects.bulk_update(batch, ["youtube_id"])
+            changed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"youtube_id set on {changed} row(s); {unparsable} URL(s) could not be parsed."))
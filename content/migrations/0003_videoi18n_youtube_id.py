@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0002_remove_video_idx_video_title_en_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videoi18n",
+            name="youtube_id",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=32
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # content/models.py
 from django.db import models
 from core.models import TimeStampedModel, Language
+from .validators import parse_youtube_id
 # REMOVE this line:
 # from django.contrib.mysql.indexes import FullTextIndex
 
@@ -45,9 +46,17 @@ class VideoI18n(TimeStampedModel):
     title_local = models.CharField(max_length=256)
     keywords_local = models.TextField(blank=True, null=True)
     youtube_url = models.URLField()
+    youtube_id = models.CharField(max_length=32, blank=True, default="", editable=False)  # parsed from youtube_url on save
     thumbnail_url = models.URLField(blank=True, null=True)
     is_published = models.BooleanField(default=True)
 
     class Meta:
         # We'll add FULLTEXT via a migration (below)
         indexes = []
+
+    def save(self, *args, **kwargs):
+        self.youtube_id = parse_youtube_id(self.youtube_url) or ""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "youtube_url" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"youtube_id"}
+        super().save(*args, **kwargs)
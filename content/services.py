@@ -0,0 +1,50 @@
+# content/services.py
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+# Bumped whenever editors touch Subtopic/Video or their i18n rows (see content.signals).
+# Every worker must see the bump, so CACHES["default"] is Redis when REDIS_CACHE_URL is set.
+CONTENT_VERSION_KEY = "content:catalog:version"
+
+# Without a shared cache each process holds its own copy of the key; it expires after
+# this many seconds and is derived again from the content tables, so a process picks up
+# another worker's edit within that time and the value only moves when the data did.
+CONTENT_VERSION_LOCAL_TTL = getattr(settings, "CONTENT_VERSION_LOCAL_TTL", 60)
+_PROCESS_LOCAL_CACHES = ("LocMemCache", "DummyCache")
+
+def _version_timeout() -> Optional[int]:
+    backend = settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1]
+    return CONTENT_VERSION_LOCAL_TTL if backend in _PROCESS_LOCAL_CACHES else None
+
+def _data_version() -> int:
+    """
+    Latest updated_at across the catalog tables in milliseconds, plus their row count so
+    deletions move it too. Same data, same value, in every process.
+    """
+    from .models import Subtopic, SubtopicI18n, Video, VideoI18n
+    latest, rows = 0, 0
+    for model in (Subtopic, SubtopicI18n, Video, VideoI18n):
+        agg = model.objects.aggregate(latest=Max("updated_at"), rows=Count("pk"))
+        if agg["latest"] is not None:
+            latest = max(latest, int(agg["latest"].timestamp() * 1000))
+        rows += agg["rows"]
+    return latest + rows
+
+def content_version() -> int:
+    """
+    Current catalog version (milliseconds timestamp of the last content change).
+    Derived from the content tables on first use, so all workers agree on one value.
+    """
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        cache.add(CONTENT_VERSION_KEY, _data_version(), timeout=_version_timeout())
+        version = cache.get(CONTENT_VERSION_KEY) or _data_version()
+    return version
+
+def bump_content_version() -> int:
+    version = _data_version()
+    cache.set(CONTENT_VERSION_KEY, version, timeout=_version_timeout())
+    return version
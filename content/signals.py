@@ -0,0 +1,26 @@
+# content/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+
+from .models import Subtopic, SubtopicI18n, Video, VideoI18n
+from .services import bump_content_version
+
+# Sent (after commit) once the catalog version has moved; kwargs: version.
+catalog_changed = Signal()
+
+def _bump_and_notify():
+    version = bump_content_version()
+    catalog_changed.send(sender=Subtopic, version=version)
+
+@receiver(post_save, sender=Subtopic)
+@receiver(post_save, sender=SubtopicI18n)
+@receiver(post_save, sender=Video)
+@receiver(post_save, sender=VideoI18n)
+@receiver(post_delete, sender=Subtopic)
+@receiver(post_delete, sender=SubtopicI18n)
+@receiver(post_delete, sender=Video)
+@receiver(post_delete, sender=VideoI18n)
+def content_changed(sender, instance, **kwargs):
+    # Bump after commit so no worker rebuilds its snapshot from uncommitted rows.
+    transaction.on_commit(_bump_and_notify)
@@ -1,7 +1,11 @@
 # content/validators.py
+import re
 from urllib.parse import urlparse, parse_qs
 from django.core.exceptions import ValidationError
 
+# YouTube video ids are exactly 11 URL-safe base64 characters (VideoI18n.youtube_id is max 32).
+YOUTUBE_ID_RE = re.compile(r"[A-Za-z0-9_-]{11}")
+
 ALLOWED_HOSTS = {
     "youtube.com", "www.youtube.com", "m.youtube.com",
     "youtu.be", "www.youtu.be",
@@ -29,8 +33,30 @@ def _extract_youtube_id(url: str) -> str | None:
 
     return None
 
+def _lenient_youtube_id(url: str) -> str | None:
+    try:
+        p = urlparse(url or "")
+    except ValueError:
+        return None
+    host = (p.netloc or "").lower()
+    if "youtu.be" in host:
+        vid = p.path.strip("/").split("/")[0]
+        return vid or None
+    if "youtube.com" in host:
+        if p.path == "/watch":
+            return parse_qs(p.query).get("v", [None])[0]
+        parts = [seg for seg in p.path.strip("/").split("/") if seg]
+        if len(parts) >= 2 and parts[0] in {"embed", "shorts"}:
+            return parts[1]
+    return None
+
+def parse_youtube_id(url: str) -> str | None:
+    """Lenient id extraction for stored URLs (any youtube.com / youtu.be host); None unless a valid 11-char id."""
+    vid = _lenient_youtube_id(url)
+    return vid if vid and YOUTUBE_ID_RE.fullmatch(vid) else None
+
 def validate_youtube_url(value: str):
     vid = _extract_youtube_id(value)
-    if not vid or len(vid) < 8:
+    if not vid or not YOUTUBE_ID_RE.fullmatch(vid):
         raise ValidationError("Enter a valid YouTube URL (watch?v=, youtu.be/, /embed/, or /shorts/).")
     return value
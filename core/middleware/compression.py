@@ -0,0 +1,106 @@
+import gzip
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+_COMPRESSIBLE = ("text/html", "application/json", "text/csv", "application/javascript", "text/plain")
+_DEFAULT_PATHS = (
+    r"^/s/",                      # share links
+    r"^/p/",                      # patient pages
+    r"^/portal/[^/]+/ajax/",      # portal AJAX JSON (pages with CSRF tokens stay uncompressed)
+    r"^/ops/analytics/export/",   # CSV exports
+)
+
+def encode_body(data: bytes, encoding: str, best: bool = False) -> bytes:
+    """gzip/brotli-compress `data`; `best` trades CPU for size (offline use, e.g. pre-render)."""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else 5)
+    return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+def pick_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    for enc in ENCODINGS:
+        if enc in accepted:
+            return enc
+    return None
+
+class _CompressedCache:
+    """Small LRU of compressed bodies keyed by (ETag, encoding, length)."""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, int], bytes]" = OrderedDict()
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body: bytes):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class CompressionMiddleware:
+    """
+    gzip (brotli when the `brotli` package is installed) for the patient pages,
+    portal AJAX JSON and analytics CSV exports. Paths are matched against
+    COMPRESS_PATHS; bodies below COMPRESS_MIN_SIZE bytes are left alone.
+    Responses with an ETag (patient pages answer the same bytes for the same
+    ETag) keep their compressed variant in an in-process LRU, so cache hits
+    are not recompressed.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = [re.compile(p) for p in getattr(settings, "COMPRESS_PATHS", _DEFAULT_PATHS)]
+        self.min_size = getattr(settings, "COMPRESS_MIN_SIZE", 512)
+        self.cache = _CompressedCache(getattr(settings, "COMPRESS_CACHE_ENTRIES", 1024))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not any(p.match(request.path) for p in self.paths):
+            return response
+        if response.streaming or response.status_code != 200 or response.has_header("Content-Encoding"):
+            return response
+        if not response.get("Content-Type", "").startswith(_COMPRESSIBLE):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if len(response.content) < self.min_size:
+            return response
+        encoding = pick_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        etag = response.get("ETag")
+        key = (etag, encoding, len(response.content)) if etag else None
+        body = self.cache.get(key) if key else None
+        if body is None:
+            body = encode_body(response.content, encoding)
+            if len(body) >= len(response.content):
+                return response
+            if key:
+                self.cache.put(key, body)
+
+        response.content = body
+        response["Content-Length"] = str(len(body))
+        response["Content-Encoding"] = encoding
+        if etag:
+            # Same rule as django.middleware.gzip: the compressed variant gets a weak ETag.
+            response["ETag"] = re.sub(r'^"', 'W/"', etag)
+        return response
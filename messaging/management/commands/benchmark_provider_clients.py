@@ -0,0 +1,94 @@
+import json
+import ssl
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from messaging.models import OutboundMessage
+from messaging.providers import clients
+from messaging.providers.whatsapp import _send_meta_cloud
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Answers POST /<phone id>/messages like the WhatsApp Cloud API, with keep-alive."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1  # headers and body in one write, like a real API front end
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = json.dumps({"messages": [{"id": "wamid.benchmark"}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def _summary(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {"mean": statistics.fmean(ms), "p50": ms[len(ms) // 2], "p95": ms[int(len(ms) * 0.95) - 1]}
+
+class Command(BaseCommand):
+    help = ("Measure per-message WhatsApp send latency against a local stand-in server: a fresh session "
+            "per message (old, as requests.post) vs the pooled per-process session (messaging.providers.clients).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=300, help="Sends per mode")
+        parser.add_argument("--certfile", help="Serve TLS with this certificate (includes handshake cost)")
+        parser.add_argument("--keyfile", help="Private key for --certfile")
+
+    def handle(self, *args, **opts):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+        scheme = "http"
+        if opts["certfile"]:
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ctx.load_cert_chain(opts["certfile"], opts["keyfile"])
+            server.socket = ctx.wrap_socket(server.socket, server_side=True)
+            scheme = "https"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"{scheme}://127.0.0.1:{server.server_address[1]}"
+        verify = opts["certfile"] or True
+
+        om = OutboundMessage(to_msisdn="9999999999", channel="whatsapp", body_rendered="benchmark")
+        payload = json.dumps({"messaging_product": "whatsapp", "to": "919999999999", "type": "text",
+                              "text": {"body": om.body_rendered}})
+        headers = {"Authorization": "Bearer bench", "Content-Type": "application/json"}
+        try:
+            # Both modes ignore the environment (proxies, REQUESTS_CA_BUNDLE, netrc), so they are
+            # timed like for like; REQUESTS_CA_BUNDLE would otherwise also replace `verify`.
+            fresh = []
+            for _ in range(opts["count"]):
+                t0 = time.perf_counter()
+                with requests.Session() as once:  # what requests.post does, minus trust_env
+                    once.trust_env = False
+                    once.post(f"{base}/bench/messages", headers=headers, data=payload, timeout=20,
+                              verify=verify).json()
+                fresh.append(time.perf_counter() - t0)
+
+            clients.reset()
+            session = clients.http_session()
+            session.verify = verify
+            session.trust_env = False
+            pooled = []
+            with override_settings(WABA_API_BASE=base, WABA_PHONE_NUMBER_ID="bench", WABA_TOKEN="bench"):
+                for _ in range(opts["count"]):
+                    t0 = time.perf_counter()
+                    _send_meta_cloud(om)
+                    pooled.append(time.perf_counter() - t0)
+        finally:
+            server.shutdown()
+            clients.reset()
+
+        before, after = _summary(fresh), _summary(pooled)
+        for label, s in (("fresh session per message", before), ("pooled session", after)):
+            self.stdout.write(f"{label:<26} mean {s['mean']:7.2f} ms   p50 {s['p50']:7.2f} ms   p95 {s['p95']:7.2f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"{scheme.upper()}, {opts['count']} sends each: mean {before['mean'] / after['mean']:.1f}x faster pooled "
+            "(first pooled send includes the only handshake)."))
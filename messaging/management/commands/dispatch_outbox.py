@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from messaging.outbox import OUTBOX_DISPATCH_LIMIT, OUTBOX_STUCK_AFTER, dispatch_pending, release_stuck
+
+class Command(BaseCommand):
+    help = ("Dispatch queued OutboundMessage rows in batches (SELECT ... FOR UPDATE SKIP LOCKED) and "
+            "release rows stuck in claimed/sending/retrying.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=OUTBOX_DISPATCH_LIMIT, help="Max messages to dispatch")
+        parser.add_argument("--stuck-after", type=int, default=OUTBOX_STUCK_AFTER,
+                            help="Seconds in claimed/sending/retrying before a row is queued again")
+
+    def handle(self, *args, **opts):
+        released = release_stuck(opts["stuck_after"])
+        dispatched = dispatch_pending(opts["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Released {released} stuck, dispatched {dispatched} message(s)."))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+        ("messaging", "0004_outboundmessage_dedupe_key_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="outboundmessage",
+            index=models.Index(
+                fields=["status", "id"], name="messaging_o_status_9c079b_idx"
+            ),
+        ),
+    ]
@@ -37,7 +37,7 @@ class OutboundMessage(TimeStampedModel):
     body_rendered = models.TextField()
 
     provider_message_id = models.CharField(max_length=128, blank=True, null=True)
-    status = models.CharField(max_length=32, default="queued")  # queued/sent/delivered/failed
+    status = models.CharField(max_length=32, default="queued")  # queued/claimed/sending/retrying/sent/delivered/failed (messaging.outbox)
     status_meta = models.JSONField(default=dict, blank=True)
 
     dedupe_key = models.CharField(max_length=64, blank=True, db_index=True)  # new
@@ -47,5 +47,6 @@ class OutboundMessage(TimeStampedModel):
             models.Index(fields=["channel", "status", "created_at"]),
             models.Index(fields=["provider_message_id"]),  # new
             models.Index(fields=["dedupe_key"]),  # new
+            models.Index(fields=["status", "id"]),  # outbox claims (status='queued' ORDER BY id)
         ]
 
@@ -0,0 +1,92 @@
+# messaging/outbox.py
+"""
+Transactional outbox for OutboundMessage.
+
+A message is inserted as "queued" in the same transaction as the share that
+produced it. After that transaction commits (messaging.signals, bulk share),
+`dispatch_pending` claims queued rows with SELECT ... FOR UPDATE SKIP LOCKED
+LIMIT n, marks them "claimed" and hands each batch to one send_outbound_batch
+task, so concurrent dispatchers never claim the same row and a burst costs one
+broker message per batch instead of one per message.
+
+Status flow: queued → claimed → sending → sent, or → retrying (the Celery
+retry chain of send_outbound_message) → sent | failed. A commit hook only
+dispatches the messages its own transaction created; the periodic
+`dispatch_outbox` command dispatches whatever the hooks missed (broker down,
+process killed) and puts rows stuck in claimed/sending/retrying back to queued
+(retrying rows older than OUTBOX_RETRY_GIVE_UP are marked failed instead).
+Delivery is at-least-once: a worker that dies mid-send gets its message re-sent.
+"""
+import logging
+from datetime import timedelta
+from functools import partial
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundMessage
+from .tasks import OUTBOUND_BATCH_SIZE, send_outbound_batch
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DISPATCH_LIMIT = getattr(settings, "OUTBOX_DISPATCH_LIMIT", 1000)  # rows per dispatch pass
+OUTBOX_STUCK_AFTER = getattr(settings, "OUTBOX_STUCK_AFTER", 900)  # seconds in claimed/sending/retrying before release
+OUTBOX_RETRY_GIVE_UP = getattr(settings, "OUTBOX_RETRY_GIVE_UP", 86400)  # message age after which a stuck retry fails
+
+def claim_pending(limit: int, only: Optional[Iterable[int]] = None) -> List[int]:
+    """Lock up to `limit` queued rows nobody else holds (among `only`, if given) and mark them claimed."""
+    with transaction.atomic():
+        rows = OutboundMessage.objects.select_for_update(skip_locked=True).filter(status="queued")
+        if only is not None:
+            rows = rows.filter(id__in=only)
+        ids = list(rows.order_by("id").values_list("id", flat=True)[:limit])
+        if ids:
+            OutboundMessage.objects.filter(id__in=ids).update(status="claimed", updated_at=timezone.now())
+    return ids
+
+def dispatch_pending(limit: Optional[int] = None, only: Optional[List[int]] = None) -> int:
+    """Claim queued rows (only the ids in `only`, if given) batch by batch; one send_outbound_batch per batch."""
+    if limit is None:
+        limit = len(only) if only is not None else OUTBOX_DISPATCH_LIMIT
+    dispatched = 0
+    while dispatched < limit:
+        ids = claim_pending(min(OUTBOUND_BATCH_SIZE, limit - dispatched), only)
+        if not ids:
+            break
+        try:
+            send_outbound_batch.delay(ids)
+        except Exception:
+            # Broker unavailable: give the rows back; the periodic dispatcher retries.
+            OutboundMessage.objects.filter(id__in=ids, status="claimed").update(status="queued")
+            logger.warning("Outbox dispatch failed; %d message(s) left queued", len(ids), exc_info=True)
+            break
+        dispatched += len(ids)
+    return dispatched
+
+def dispatch_on_commit(ids: Iterable[int]):
+    """
+    Dispatch the given messages once the current transaction commits (immediately in
+    autocommit). Only these ids: the backlog belongs to dispatch_outbox_task, not to
+    the web request that happens to commit.
+    """
+    ids = list(ids)
+    if ids:
+        # robust: never fail the request that already committed
+        transaction.on_commit(partial(dispatch_pending, only=ids), robust=True)
+
+def release_stuck(older_than: Optional[int] = None) -> int:
+    """
+    Put rows claimed/sending/retrying for longer than `older_than` seconds back in the
+    queue. A live retry chain touches its row at least every retry_backoff_max, so an
+    older "retrying" row lost its task (enqueue failed, worker died); past
+    OUTBOX_RETRY_GIVE_UP since creation it is marked failed instead of re-queued.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=OUTBOX_STUCK_AFTER if older_than is None else older_than)
+    stale = OutboundMessage.objects.filter(updated_at__lt=cutoff)
+    stale.filter(status="retrying", created_at__lt=now - timedelta(seconds=OUTBOX_RETRY_GIVE_UP)).update(
+        status="failed", updated_at=now)
+    return (stale.filter(status__in=("claimed", "sending", "retrying"))
+            .update(status="queued", updated_at=now))
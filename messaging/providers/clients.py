@@ -0,0 +1,69 @@
+# messaging/providers/clients.py
+"""
+Long-lived, per-process provider clients.
+
+Each worker process keeps one keep-alive `requests.Session` (connection pool +
+connect retries) for the WhatsApp Cloud API and one Twilio / SendGrid client,
+so consecutive sends reuse TCP+TLS connections instead of paying a handshake
+per message. Clients are built lazily on first use and keyed by PID: a Celery
+prefork child never inherits its parent's sockets, it builds its own after the
+fork.
+"""
+import os
+import threading
+from typing import Callable, Dict, TypeVar
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+T = TypeVar("T")
+
+HTTP_POOL_SIZE = getattr(settings, "PROVIDER_HTTP_POOL_SIZE", 10)
+HTTP_CONNECT_RETRIES = getattr(settings, "PROVIDER_HTTP_RETRIES", 2)
+
+_lock = threading.Lock()
+_clients: Dict[str, object] = {}
+_pid = None
+
+def _per_process(name: str, factory: Callable[[], T]) -> T:
+    global _pid
+    with _lock:
+        if _pid != os.getpid():
+            _clients.clear()
+            _pid = os.getpid()
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = factory()
+        return client
+
+def _new_session() -> requests.Session:
+    # Only connection failures are retried: the request never reached the provider,
+    # so a retry can't send the message twice. Read/status errors go to Celery's retry.
+    retry = Retry(total=HTTP_CONNECT_RETRIES, connect=HTTP_CONNECT_RETRIES, read=0, status=0, other=0,
+                  backoff_factor=0.2)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def http_session() -> requests.Session:
+    return _per_process("http", _new_session)
+
+def twilio_client(sid: str, token: str):
+    from twilio.rest import Client
+    return _per_process(f"twilio:{sid}", lambda: Client(sid, token))
+
+def sendgrid_client(api_key: str):
+    from sendgrid import SendGridAPIClient
+    return _per_process(f"sendgrid:{api_key[-8:]}", lambda: SendGridAPIClient(api_key))
+
+def reset():
+    """Drop every client (tests, credential rotation)."""
+    with _lock:
+        for client in _clients.values():
+            if isinstance(client, requests.Session):
+                client.close()
+        _clients.clear()
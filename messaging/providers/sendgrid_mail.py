@@ -1,9 +1,9 @@
 # messaging/providers/sendgrid_mail.py
 from typing import Tuple, Dict
 from django.conf import settings
-from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 from ..models import OutboundMessage
+from .clients import sendgrid_client
 
 def send_email_message(om: OutboundMessage) -> Tuple[str, Dict]:
     """
@@ -15,7 +15,7 @@ def send_email_message(om: OutboundMessage) -> Tuple[str, Dict]:
     if not om.to_email:
         raise ValueError("OutboundMessage.to_email is required for email channel.")
 
-    sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
+    sg = sendgrid_client(settings.SENDGRID_API_KEY)  # cached per worker process
     mail = Mail(
         from_email=(settings.SENDGRID_FROM_EMAIL, settings.SENDGRID_FROM_NAME),
         to_emails=[om.to_email],
@@ -1,10 +1,10 @@
 # messaging/providers/whatsapp.py
 import os
 import json
-import requests
 from django.conf import settings
 from typing import Tuple, Dict
 from ..models import OutboundMessage
+from .clients import http_session, twilio_client
 
 def send_whatsapp_message(om: OutboundMessage) -> Tuple[str, Dict]:
     """
@@ -32,7 +32,8 @@ def _send_meta_cloud(om: OutboundMessage) -> Tuple[str, Dict]:
     if not (phone_number_id and token):
         raise RuntimeError("Meta WABA not configured (WABA_PHONE_NUMBER_ID / WABA_TOKEN).")
 
-    url = f"https://graph.facebook.com/v17.0/{phone_number_id}/messages"
+    base = getattr(settings, "WABA_API_BASE", "https://graph.facebook.com/v17.0")
+    url = f"{base}/{phone_number_id}/messages"
     headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
     payload = {
         "messaging_product": "whatsapp",
@@ -40,7 +41,7 @@ def _send_meta_cloud(om: OutboundMessage) -> Tuple[str, Dict]:
         "type": "text",
         "text": {"body": om.body_rendered},
     }
-    resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=20)
+    resp = http_session().post(url, headers=headers, data=json.dumps(payload), timeout=20)  # pooled keep-alive
     if resp.status_code >= 400:
         raise RuntimeError(f"WABA send failed: {resp.status_code} {resp.text}")
 
@@ -60,15 +61,13 @@ def _send_twilio(om: OutboundMessage) -> Tuple[str, Dict]:
     """
     Twilio WhatsApp fallback (optional). Requires TWILIO_* envs.
     """
-    from twilio.rest import Client
-
     sid = os.getenv("TWILIO_ACCOUNT_SID")
     tok = os.getenv("TWILIO_AUTH_TOKEN")
     from_whatsapp = os.getenv("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
     if not (sid and tok):
         raise RuntimeError("Twilio not configured (TWILIO_ACCOUNT_SID / TWILIO_AUTH_TOKEN).")
 
-    client = Client(sid, tok)
+    client = twilio_client(sid, tok)  # cached per worker process
     to = f"whatsapp:+91{om.to_msisdn}"
     m = client.messages.create(from_=from_whatsapp, to=to, body=om.body_rendered)
     # m.sid is the message id
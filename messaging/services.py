@@ -1,28 +1,94 @@
 # messaging/services.py
+"""
+Message rendering and outbound helpers.
+
+Templates are compiled once per (key, channel, language) into a tuple of literal
+and placeholder segments, with the English fallback already resolved, and kept
+in an in-process cache. A warm render is a join over the segments: no queries,
+no regex. Entries are dropped when a MessageTemplate / MessageTemplateI18n is
+saved or deleted (messaging.signals) and expire after MESSAGE_TEMPLATE_CACHE_TTL
+so other worker processes pick up admin edits too.
+"""
+import hashlib
 import re
-from typing import Dict
-from django.core.exceptions import ObjectDoesNotExist
-from .models import MessageTemplate, MessageTemplateI18n
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.utils import timezone
+from .models import MessageTemplateI18n, OutboundMessage
 
 _PLACEHOLDER = re.compile(r"{{\s*([a-zA-Z0-9_]+)\s*}}")
+TEMPLATE_CACHE_TTL = getattr(settings, "MESSAGE_TEMPLATE_CACHE_TTL", 300)  # seconds
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    key: str
+    channel: str
+    language: str  # language the body came from ("en" when the requested one is missing)
+    segments: Tuple[str, ...]  # literal, name, literal, name, ..., literal
+
+    def render(self, context: Dict[str, str]) -> str:
+        parts = list(self.segments)
+        for i in range(1, len(parts), 2):
+            parts[i] = str(context.get(parts[i], ""))
+        return "".join(parts)
+
+    def render_many(self, contexts: Iterable[Dict[str, str]]) -> List[str]:
+        return [self.render(ctx) for ctx in contexts]
+
+def compile_body(body: str) -> Tuple[str, ...]:
+    # re.split with one group alternates literal text and placeholder names.
+    return tuple(_PLACEHOLDER.split(body))
+
+_templates: Dict[Tuple[str, str, str], Tuple[float, CompiledTemplate]] = {}
+_templates_lock = threading.Lock()
+
+def clear_template_cache():
+    with _templates_lock:
+        _templates.clear()
+
+def get_template(key: str, language_code: str, channel: str) -> CompiledTemplate:
+    """
+    Compiled template for (key, channel, language_code), falling back to English.
+    Raises ValueError if neither exists. One query on a miss, none when warm.
+    """
+    cache_key = (key, channel, language_code)
+    now = time.monotonic()
+    with _templates_lock:
+        entry = _templates.get(cache_key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    bodies = dict(MessageTemplateI18n.objects
+                  .filter(template__key=key, template__channel=channel, language_id__in={language_code, "en"})
+                  .values_list("language_id", "body"))
+    lang = language_code if language_code in bodies else "en"
+    if lang not in bodies:
+        raise ValueError(f"Template not found: {key}/{channel}")
+    compiled = CompiledTemplate(key=key, channel=channel, language=lang, segments=compile_body(bodies[lang]))
+    with _templates_lock:
+        _templates[cache_key] = (now + TEMPLATE_CACHE_TTL, compiled)
+    return compiled
 
 def render_message(key: str, language_code: str, channel: str, context: Dict[str, str]) -> str:
     """
     Resolve template by (key, channel, language_code) and substitute {{placeholders}}.
     Fallback: English ('en') if target language missing.
     """
-    try:
-        tpl = MessageTemplate.objects.get(key=key, channel=channel)
-    except ObjectDoesNotExist:
-        raise ValueError(f"Template not found: {key}/{channel}")
-
-    try:
-        body = tpl.i18n.get(language_id=language_code).body
-    except ObjectDoesNotExist:
-        body = tpl.i18n.get(language_id="en").body  # fallback
+    return get_template(key, language_code, channel).render(context)
 
-    def repl(m):
-        name = m.group(1)
-        return str(context.get(name, ""))
+def dedupe_key(om: OutboundMessage) -> str:
+    """Same channel/recipient/template/language/body within the current hour → same key."""
+    bucket = timezone.now().strftime("%Y%m%d%H")  # hour bucket
+    base = f"{om.channel}|{om.to_msisdn or om.to_email or ''}|{om.template_key}|{om.language_id}|{(om.body_rendered or '').strip()}|{bucket}"
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
 
-    return _PLACEHOLDER.sub(repl, body)
+def dry_run_note(channel: str) -> Optional[str]:
+    """Status note for channels whose provider is switched off (messages are marked sent, not sent)."""
+    if channel == "whatsapp" and not settings.WABA_ENABLE:
+        return "WABA disabled; dry-run"
+    if channel == "email" and not settings.SENDGRID_ENABLE:
+        return "SendGrid disabled; dry-run"
+    return None
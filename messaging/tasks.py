@@ -1,9 +1,19 @@
+import logging
+from typing import List
+
 from celery import shared_task
+from django.core import management
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from .models import OutboundMessage
 from .providers.whatsapp import send_whatsapp_message
 from .providers.sendgrid_mail import send_email_message
 
+logger = logging.getLogger(__name__)
+
+OUTBOUND_BATCH_SIZE = getattr(settings, "OUTBOUND_BATCH_SIZE", 50)
+
 @shared_task(
     bind=True,
     max_retries=5,
@@ -13,6 +23,16 @@ from .providers.sendgrid_mail import send_email_message
     retry_jitter=True,
 )
 def send_outbound_message(self, outbound_id: int):
+    # Retry chain for messages that failed in a batch (status "retrying").
+    try:
+        return deliver_outbound(outbound_id)
+    except Exception:
+        if self.request.retries >= self.max_retries:
+            OutboundMessage.objects.filter(pk=outbound_id, status="retrying").update(
+                status="failed", updated_at=timezone.now())
+        raise
+
+def deliver_outbound(outbound_id: int) -> bool:
     # 1) Lock and set 'sending'
     with transaction.atomic():
         om = (OutboundMessage.objects
@@ -23,7 +43,7 @@ def send_outbound_message(self, outbound_id: int):
         if om.status == "sending":
             return True
         om.status = "sending"
-        om.save(update_fields=["status"])
+        om.save(update_fields=["status", "updated_at"])
 
     # 2) Send outside the lock
     try:
@@ -39,11 +59,37 @@ def send_outbound_message(self, outbound_id: int):
             om.provider_message_id = provider_id
             om.status = "sent"
             om.status_meta = meta or {}
-            om.save(update_fields=["provider_message_id", "status", "status_meta"])
+            om.save(update_fields=["provider_message_id", "status", "status_meta", "updated_at"])
         return True
 
     except Exception:
-        # put back to 'queued' so Celery autoretry will re-pick
+        # 'retrying': owned by send_outbound_message's autoretry, not re-claimed by the outbox
         with transaction.atomic():
-            OutboundMessage.objects.filter(pk=outbound_id, status="sending").update(status="queued")
+            OutboundMessage.objects.filter(pk=outbound_id, status="sending").update(
+                status="retrying", updated_at=timezone.now())
         raise
+
+@shared_task
+def send_outbound_batch(outbound_ids: List[int]):
+    """
+    Send several messages from one task (claimed by messaging.outbox). A failed
+    message is handed to send_outbound_message, which owns the retry/backoff policy.
+    """
+    sent = 0
+    for outbound_id in outbound_ids:
+        try:
+            deliver_outbound(outbound_id)
+            sent += 1
+        except Exception:
+            logger.warning("Outbound %s failed in batch; retrying on its own", outbound_id, exc_info=True)
+            try:
+                send_outbound_message.delay(outbound_id)
+            except Exception:
+                # Broker unavailable: the row stays "retrying" and outbox.release_stuck re-queues it.
+                logger.warning("Could not enqueue retry for outbound %s", outbound_id, exc_info=True)
+    return sent
+
+@shared_task
+def dispatch_outbox_task():
+    # Schedule every minute or so (e.g. celery beat): dispatches anything the commit hooks missed.
+    management.call_command("dispatch_outbox")
@@ -57,6 +57,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -141,6 +143,39 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Uploads and prerendered /p/ pages (default storage).
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", str(BASE_DIR / "media"))
+
+# Share-link and LinkVisit archives hold patient numbers, IPs and user agents, so
+# they go to their own storage, outside the checkout and never served over HTTP.
+ARCHIVE_ROOT = os.getenv("ARCHIVE_ROOT", "/var/lib/patient_portal/archive")
+
+# Hashed + pre-compressed (gzip/brotli) static files; WhiteNoise serves the
+# hashed names with a far-future immutable Cache-Control. Every deploy must run
+# `manage.py collectstatic --noinput` before starting the app: with DEBUG=False
+# any {% static %} (admin included) raises until the manifest exists.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "archive": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": ARCHIVE_ROOT, "base_url": None, "file_permissions_mode": 0o600,
+                    "directory_permissions_mode": 0o700},
+    },
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+
+# Shared cache: the content catalog version (content.services), page ETags and rate
+# limits must agree across every gunicorn/celery process, so production sets
+# REDIS_CACHE_URL. Without it each process caches on its own and re-derives the
+# catalog version from the content tables every CONTENT_VERSION_LOCAL_TTL seconds.
+REDIS_CACHE_URL = os.getenv("REDIS_CACHE_URL", "")
+if REDIS_CACHE_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_CACHE_URL}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -156,6 +191,7 @@ WABA_ENABLE = _bool_env("WABA_ENABLE", True)
 WABA_PROVIDER = os.getenv("WABA_PROVIDER", "meta")
 WABA_PHONE_NUMBER_ID = os.getenv("WABA_PHONE_NUMBER_ID", "")
 WABA_TOKEN = os.getenv("WABA_TOKEN", "")
+WABA_API_BASE = os.getenv("WABA_API_BASE", "https://graph.facebook.com/v17.0")  # Cloud API root (override for staging/stand-ins)
 
 # Email (SendGrid)
 SENDGRID_ENABLE = _bool_env("SENDGRID_ENABLE", True)
@@ -174,4 +210,35 @@ LOGGING = {
         "django.db.backends": {"handlers": ["console"], "level": "WARNING"},  # set to DEBUG to see SQL
         "celery": {"handlers": ["console"], "level": "INFO"},
     },
-}
\ No newline at end of file
+}
+
+# --- Patient pages & visit tracking ---
+PATIENT_PAGE_MAX_AGE = int(os.getenv("PATIENT_PAGE_MAX_AGE", "300"))  # public Cache-Control on /p/ pages
+VISIT_BUFFER_ENABLED = _bool_env("VISIT_BUFFER_ENABLED", True)  # False → write LinkVisit synchronously
+VISIT_BUFFER_SIZE = int(os.getenv("VISIT_BUFFER_SIZE", "10000"))  # per worker; overflow is dropped + counted
+VISIT_FLUSH_BATCH = int(os.getenv("VISIT_FLUSH_BATCH", "500"))
+VISIT_FLUSH_INTERVAL = float(os.getenv("VISIT_FLUSH_INTERVAL", "2.0"))  # seconds
+SHARE_TOKEN_CACHE_SIZE = int(os.getenv("SHARE_TOKEN_CACHE_SIZE", "20000"))  # resolved /s/<token>/ links per worker
+SHARE_TOKEN_CACHE_TTL = int(os.getenv("SHARE_TOKEN_CACHE_TTL", "300"))
+SHARE_TOKEN_NEGATIVE_TTL = int(os.getenv("SHARE_TOKEN_NEGATIVE_TTL", "30"))  # unknown tokens
+SHARE_TOKEN_FORMAT = os.getenv("SHARE_TOKEN_FORMAT", "random")  # "signed": <pk+type>.<hmac>, resolved by primary key
+SHARE_TOKEN_SECRET = os.getenv("SHARE_TOKEN_SECRET", "")  # HMAC key for signed tokens; defaults to SECRET_KEY
+PRERENDER_PORTALS = _bool_env("PRERENDER_PORTALS", False)  # serve/refresh static copies of /p/ pages
+PRERENDER_ROOT = os.getenv("PRERENDER_ROOT", "portals")  # prefix inside default_storage
+PRERENDER_DELAY = int(os.getenv("PRERENDER_DELAY", "30"))  # seconds; debounces bursts of admin edits
+VISIT_SESSION_WINDOW = int(os.getenv("VISIT_SESSION_WINDOW", "1800"))  # seconds of inactivity that end a LinkSession
+LINK_VISIT_SAMPLE_RATE = float(os.getenv("LINK_VISIT_SAMPLE_RATE", "0.0"))  # fraction of page views also kept as raw LinkVisit rows
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "512"))  # bytes; smaller responses go out uncompressed
+LINK_VISIT_PARTITIONS_AHEAD = int(os.getenv("LINK_VISIT_PARTITIONS_AHEAD", "3"))  # monthly MySQL partitions kept ready
+LINK_VISIT_RETENTION_MONTHS = int(os.getenv("LINK_VISIT_RETENTION_MONTHS", "13"))  # 0 = keep raw visits forever
+SHARE_LINK_ARCHIVE_GRACE_DAYS = int(os.getenv("SHARE_LINK_ARCHIVE_GRACE_DAYS", "30"))  # expired links stay hot this long, then archive_expired_links moves them out
+BULK_SHARE_MAX_RECIPIENTS = int(os.getenv("BULK_SHARE_MAX_RECIPIENTS", "500"))  # numbers per portal bulk share
+OUTBOUND_BATCH_SIZE = int(os.getenv("OUTBOUND_BATCH_SIZE", "50"))  # messages per send_outbound_batch task
+MESSAGE_TEMPLATE_CACHE_TTL = int(os.getenv("MESSAGE_TEMPLATE_CACHE_TTL", "300"))  # compiled message templates per worker; edits also clear it via signals
+SHARE_DIRECTORY_CACHE_TTL = int(os.getenv("SHARE_DIRECTORY_CACHE_TTL", "300"))  # cached (user, clinic) → doctor and language codes used by share creation
+OUTBOX_DISPATCH_LIMIT = int(os.getenv("OUTBOX_DISPATCH_LIMIT", "1000"))  # outbound messages claimed per dispatch pass
+OUTBOX_STUCK_AFTER = int(os.getenv("OUTBOX_STUCK_AFTER", "900"))  # seconds in claimed/sending/retrying before a message is re-queued
+OUTBOX_RETRY_GIVE_UP = int(os.getenv("OUTBOX_RETRY_GIVE_UP", "86400"))  # seconds after creation when a stuck retrying message is marked failed instead
+PROVIDER_HTTP_POOL_SIZE = int(os.getenv("PROVIDER_HTTP_POOL_SIZE", "10"))  # keep-alive connections per host per worker process
+PROVIDER_HTTP_RETRIES = int(os.getenv("PROVIDER_HTTP_RETRIES", "2"))  # connect-failure retries only (never re-sends)
+CONTENT_VERSION_LOCAL_TTL = int(os.getenv("CONTENT_VERSION_LOCAL_TTL", "60"))  # seconds a process-local cache keeps the catalog version before re-deriving it from the content tables
@@ -1,5 +1,10 @@
 # portal/forms_share.py
+import csv
+import io
+import re
+
 from django import forms
+from django.conf import settings
 from django.core.validators import RegexValidator
 from core.models import Language
 from content.models import Subtopic, Video, VideoI18n
@@ -44,6 +49,68 @@ class ShareForm(forms.Form):
         return data
 
 
+_NUMBER_SPLIT = re.compile(r"[\s,;]+")
+
+def normalize_msisdn(raw: str):
+    """'+91 98765-43210' / '098765 43210' / '9876543210' → '9876543210'; None if not a 10-digit number."""
+    digits = re.sub(r"\D", "", raw)
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits if len(digits) == 10 else None
+
+class BulkShareForm(ShareForm):
+    """ShareForm for many patients: numbers pasted (any separator) and/or a CSV with numbers in any column."""
+    patient_msisdn = None
+    video = forms.ModelChoiceField(queryset=Video.objects.filter(is_active=True), required=False)
+    numbers = forms.CharField(widget=forms.Textarea(attrs={"rows": 8}), required=False,
+                              label="Patient WhatsApp numbers (one per line, or comma separated)")
+    csv_file = forms.FileField(required=False, label="…or upload a CSV")
+
+    def clean_csv_file(self):
+        f = self.cleaned_data.get("csv_file")
+        if f and f.size > 1024 * 1024:
+            raise forms.ValidationError("CSV is too large (1 MB max).")
+        return f
+
+    def clean(self):
+        data = super().clean()
+        if self.data.get("__portal__"):
+            # "Share entire portal": nothing to pick
+            for field in ("video", "subtopic"):
+                self.errors.pop(field, None)
+            data["share_kind"] = "portal"
+        raw = [x for x in _NUMBER_SPLIT.split(data.get("numbers") or "") if x]
+        f = data.get("csv_file")
+        if f:
+            try:
+                text = f.read().decode("utf-8-sig")
+            except UnicodeDecodeError:
+                self.add_error("csv_file", "CSV must be UTF-8 text.")
+                text = ""
+            for row in csv.reader(io.StringIO(text)):
+                # Header and name columns carry no digits; a row's number is its first cell with digits.
+                cell = next((c for c in row if re.search(r"\d", c)), None)
+                if cell:
+                    raw.append(cell.strip())
+
+        recipients, invalid = [], []
+        for item in raw:
+            msisdn = normalize_msisdn(item)
+            if msisdn:
+                recipients.append(msisdn)
+            else:
+                invalid.append(item)
+        limit = getattr(settings, "BULK_SHARE_MAX_RECIPIENTS", 500)
+        if not recipients:
+            self.add_error("numbers", "Enter at least one 10-digit WhatsApp number.")
+        elif len(recipients) > limit:
+            self.add_error("numbers", f"At most {limit} numbers per bulk share ({len(recipients)} given).")
+        data["recipients"], data["invalid"] = recipients, invalid
+        return data
+
+
 class SearchForm(forms.Form):
     q = forms.CharField(max_length=200, required=False, label="Search term")
     language = forms.ModelChoiceField(
@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import PortalLoginView, PortalLogoutView, PortalHomeView
-from .views_share import ShareComposeView, ShareConfirmView, ajax_videos_for_subtopic, ajax_languages_for_video, ajax_suggest_titles
+from .views_share import BulkShareView, ShareComposeView, ShareConfirmView, ajax_videos_for_subtopic, ajax_languages_for_video, ajax_suggest_titles
 
 app_name = "portal"
 
@@ -10,6 +10,7 @@ urlpatterns = [
     path("portal/<slug:slug>/", PortalHomeView.as_view(), name="home"),
 
     path("portal/<slug:slug>/share/", ShareComposeView.as_view(), name="share"),
+    path("portal/<slug:slug>/share/bulk/", BulkShareView.as_view(), name="share_bulk"),
     path("portal/<slug:slug>/share/confirm/<str:token>/", ShareConfirmView.as_view(), name="share_confirm"),
 
     path("portal/<slug:slug>/ajax/videos/", ajax_videos_for_subtopic, name="ajax_videos"),
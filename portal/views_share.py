@@ -9,8 +9,9 @@ from django.db.models.expressions import RawSQL
 from clinics.models import Clinic
 from content.models import Video, Subtopic, VideoI18n
 from core.models import Language
-from sharing.services import create_share
-from .forms import ShareForm
+from sharing.links import share_url
+from sharing.services import create_bulk_share, create_share
+from .forms import BulkShareForm, ShareForm
 from .views import ClinicContextMixin   # from Sprint 4 mixin
 
 def _abs(request, path: str) -> str:
@@ -49,10 +50,8 @@ class ShareComposeView(ClinicContextMixin, FormView):
         link, event, om, deeplink = create_share(
             clinic=self.clinic, language_code=lang, patient_msisdn=msisdn,
             share_type=kind if kind in ("video", "subtopic", "portal") else "video",
-            video=video, subtopic=subtopic, acting_user=self.request.user
+            video=video, subtopic=subtopic, acting_user=self.request.user, base_url=_abs(self.request, "")
         )
-        om.body_rendered = om.body_rendered.replace("/s/", _abs(self.request, "/s/"))
-        om.save(update_fields=["body_rendered"])
 
         self.success_url = reverse("portal:share_confirm",
                                    kwargs={"slug": self.clinic.portal_slug, "token": link.token})
@@ -60,6 +59,30 @@ class ShareComposeView(ClinicContextMixin, FormView):
         return super().form_valid(form)
 
 
+class BulkShareView(ShareComposeView):
+    """One item to a list of patients (pasted numbers and/or CSV); results are shown per number."""
+    template_name = "portal/share_bulk.html"
+    form_class = BulkShareForm
+
+    def form_valid(self, form):
+        data = form.cleaned_data
+        try:
+            results = create_bulk_share(
+                clinic=self.clinic, language_code=data["language"].code, msisdns=data["recipients"],
+                share_type=data["share_kind"], video=data.get("video"), subtopic=data.get("subtopic"),
+                acting_user=self.request.user, base_url=_abs(self.request, ""),
+            )
+        except ValueError as exc:
+            form.add_error(None, str(exc))
+            return self.form_invalid(form)
+        results += [{"msisdn": raw, "status": "invalid"} for raw in data["invalid"]]
+
+        counts = {}
+        for r in results:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        return self.render_to_response(self.get_context_data(form=form, results=results, counts=sorted(counts.items())))
+
+
 # Confirmation page: show message + "Open WhatsApp" button
 class ShareConfirmView(ClinicContextMixin, TemplateView):
     template_name = "portal/share_confirm.html"
@@ -81,7 +104,7 @@ class ShareConfirmView(ClinicContextMixin, TemplateView):
         wa = self.request.session.pop(f"wa:{link.token}", None)
         ctx.update({
             "clinic": self.clinic,
-            "share_link": _abs(self.request, f"/s/{link.token}/"),
+            "share_link": _abs(self.request, share_url(link.token)),
             "message_preview": om.body_rendered if om else "",
             "wa_deeplink": wa,
         })
@@ -0,0 +1,138 @@
+# sharing/catalog.py
+"""
+Per-language, in-process snapshot of the patient-facing content catalog.
+
+The catalog only changes when editors touch the admin, so each worker keeps an
+immutable snapshot per language and rebuilds it lazily when the content version
+(content.services.content_version) moves. In the steady state the patient pages
+read titles, thumbnails, YouTube ids and video ordering without any DB query.
+"""
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from content.models import Subtopic, Video
+from content.services import content_version
+from .utils import localize_videos, localize_subtopics
+
+# Unknown language slugs still render (English fallbacks) but are not retained
+# beyond this many snapshots, so random /p/<slug>/<lang>/ probes cannot grow memory.
+_MAX_SNAPSHOTS = 16
+
+@dataclass(frozen=True)
+class VideoEntry:
+    id: int
+    slug: str
+    subtopic_id: int
+    subtopic_slug: str
+    title: str
+    thumb: Optional[str]
+    youtube_url: Optional[str]
+    youtube_id: Optional[str]
+    is_active: bool
+
+@dataclass(frozen=True)
+class SubtopicEntry:
+    id: int
+    slug: str
+    name: str
+    thumb: Optional[str]
+    is_active: bool
+    video_slugs: Tuple[str, ...]  # active videos, display order
+
+@dataclass(frozen=True)
+class Catalog:
+    lang: str
+    version: int
+    subtopic_slugs: Tuple[str, ...]  # active subtopics, display order
+    subtopics: Mapping[str, SubtopicEntry]
+    videos: Mapping[str, VideoEntry]
+    subtopic_ids: Mapping[int, str]
+    video_ids: Mapping[int, str]
+
+    def subtopic(self, slug: str) -> Optional[SubtopicEntry]:
+        return self.subtopics.get(slug)
+
+    def video(self, slug: str) -> Optional[VideoEntry]:
+        return self.videos.get(slug)
+
+    def subtopic_by_id(self, pk: Optional[int]) -> Optional[SubtopicEntry]:
+        slug = self.subtopic_ids.get(pk)
+        return self.subtopics[slug] if slug else None
+
+    def video_by_id(self, pk: Optional[int]) -> Optional[VideoEntry]:
+        slug = self.video_ids.get(pk)
+        return self.videos[slug] if slug else None
+
+    def active_subtopics(self) -> List[SubtopicEntry]:
+        return [self.subtopics[s] for s in self.subtopic_slugs]
+
+    def videos_for(self, subtopic: SubtopicEntry) -> List[VideoEntry]:
+        return [self.videos[v] for v in subtopic.video_slugs]
+
+def build_catalog(lang: str, version: int) -> Catalog:
+    """Load the whole catalog for one language (four queries)."""
+    subs = list(Subtopic.objects.order_by("sort_order", "slug"))
+    videos = list(Video.objects.order_by("sort_order", "title_en"))
+    sub_by_id = {s.id: s for s in subs}
+    for v in videos:
+        v.subtopic = sub_by_id[v.subtopic_id]  # reuse loaded rows for the thumbnail fallback
+
+    smeta = localize_subtopics(subs, lang)
+    vmeta = localize_videos(videos, lang)
+
+    video_entries = {}
+    active_by_subtopic: Dict[int, List[str]] = {s.id: [] for s in subs}
+    for v in videos:
+        meta = vmeta[v.id]
+        video_entries[v.slug] = VideoEntry(
+            id=v.id, slug=v.slug, subtopic_id=v.subtopic_id, subtopic_slug=v.subtopic.slug,
+            title=meta["title"], thumb=meta["thumb"],
+            youtube_url=meta["youtube_url"], youtube_id=meta["youtube_id"],
+            is_active=v.is_active,
+        )
+        if v.is_active:
+            active_by_subtopic[v.subtopic_id].append(v.slug)
+
+    subtopic_entries = {}
+    for s in subs:
+        subtopic_entries[s.slug] = SubtopicEntry(
+            id=s.id, slug=s.slug, name=smeta[s.id]["name"], thumb=smeta[s.id]["thumb"],
+            is_active=s.is_active, video_slugs=tuple(active_by_subtopic[s.id]),
+        )
+
+    return Catalog(
+        lang=lang,
+        version=version,
+        subtopic_slugs=tuple(s.slug for s in subs if s.is_active),
+        subtopics=MappingProxyType(subtopic_entries),
+        videos=MappingProxyType(video_entries),
+        subtopic_ids=MappingProxyType({s.id: s.slug for s in subs}),
+        video_ids=MappingProxyType({v.id: v.slug for v in videos}),
+    )
+
+_lock = threading.Lock()
+_snapshots: Dict[str, Catalog] = {}
+
+def get_catalog(lang: str) -> Catalog:
+    """Return the snapshot for `lang`, rebuilding it if the content version moved."""
+    version = content_version()
+    snap = _snapshots.get(lang)
+    if snap is not None and snap.version == version:
+        return snap
+
+    with _lock:
+        snap = _snapshots.get(lang)
+        if snap is not None and snap.version == version:
+            return snap
+        snap = build_catalog(lang, version)
+        for code in [c for c, s in _snapshots.items() if s.version != version]:
+            del _snapshots[code]
+        if lang in _snapshots or len(_snapshots) < _MAX_SNAPSHOTS:
+            _snapshots[lang] = snap
+        return snap
+
+def clear_catalog_snapshots():
+    with _lock:
+        _snapshots.clear()
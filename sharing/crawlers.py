@@ -0,0 +1,76 @@
+# sharing/crawlers.py
+"""
+Link-preview fast path for /s/<token>/.
+
+WhatsApp, Facebook, Telegram and other unfurlers fetch a shared link as soon as
+the message is sent, before the patient ever opens it. Those fetches get a tiny
+OpenGraph-only document (title, thumbnail, clinic name) built from the resolved
+link and the in-process catalog: no template rendering, no LinkVisit/session,
+no visit cookie. They are counted separately on ShareLink.preview_count.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.html import escape
+
+from content.services import content_version
+from .catalog import get_catalog
+from .links import share_url
+from .resolver import ResolvedLink
+
+_PREVIEW_AGENTS = re.compile(
+    r"WhatsApp|facebookexternalhit|Facebot|Twitterbot|TelegramBot|Slackbot|Slack-ImgProxy|"
+    r"LinkedInBot|Discordbot|SkypeUriPreview|SnapchatPreview|Pinterestbot|redditbot|"
+    r"Embedly|vkShare|Iframely|Google-PageRenderer|Applebot|bitlybot",
+    re.IGNORECASE,
+)
+PREVIEW_MAX_AGE = getattr(settings, "PREVIEW_MAX_AGE", 3600)
+
+@lru_cache(maxsize=2048)
+def is_preview_agent(user_agent: str) -> bool:
+    return bool(user_agent) and _PREVIEW_AGENTS.search(user_agent) is not None
+
+def _preview_fields(link: ResolvedLink):
+    clinic = link.clinic
+    catalog = get_catalog(link.language)
+    title, image = clinic.name, clinic.logo_url
+    if link.type == "video":
+        video = catalog.video_by_id(link.video_id)
+        if video is not None:
+            title, image = video.title, video.thumb or image
+    elif link.type == "subtopic":
+        subtopic = catalog.subtopic_by_id(link.subtopic_id)
+        if subtopic is not None:
+            title, image = subtopic.name, subtopic.thumb or image
+    return title, image
+
+@lru_cache(maxsize=4096)
+def _preview_html(link: ResolvedLink, version: int, base_url: str) -> bytes:
+    # `version` only keys the cache: catalog edits produce a new entry.
+    title, image = _preview_fields(link)
+    if image and not image.startswith(("http://", "https://")):
+        image = base_url + image.lstrip("/")
+    meta = [
+        ("og:type", "website"),
+        ("og:title", title),
+        ("og:site_name", link.clinic.name),
+        ("og:description", link.clinic.name),
+        ("og:url", base_url + share_url(link.token).lstrip("/")),
+    ]
+    if image:
+        meta.append(("og:image", image))
+    tags = "".join(f'<meta property="{p}" content="{escape(v)}">' for p, v in meta if v)
+    return (
+        f'<!doctype html><html><head><meta charset="utf-8"><title>{escape(title)}</title>{tags}'
+        f"</head><body></body></html>"
+    ).encode("utf-8")
+
+def preview_response(request, link: ResolvedLink) -> HttpResponse:
+    response = HttpResponse(_preview_html(link, content_version(), request.build_absolute_uri("/")),
+                            content_type="text/html; charset=utf-8")
+    patch_cache_control(response, public=True, max_age=PREVIEW_MAX_AGE)
+    patch_vary_headers(response, ("User-Agent",))  # same URL as the patient page: never serve one for the other
+    return response
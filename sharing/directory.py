@@ -0,0 +1,86 @@
+# sharing/directory.py
+"""
+Cached lookups for share creation: which doctor a share made by (user, clinic)
+goes out as, and which language codes exist.
+
+Both are per-process dicts with a TTL (SHARE_DIRECTORY_CACHE_TTL). Doctor
+entries are dropped when a ClinicMember or DoctorClinic of the clinic changes,
+or any Doctor is saved (the name is in the message); the language set when a
+Language changes (sharing.signals). With a warm cache, create_share reaches its
+first INSERT without a query.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from django.conf import settings
+
+from clinics.models import DoctorClinic
+from core.models import Language
+
+DIRECTORY_CACHE_TTL = getattr(settings, "SHARE_DIRECTORY_CACHE_TTL", 300)  # seconds
+
+@dataclass(frozen=True)
+class DoctorRef:
+    id: int
+    full_name: str
+
+_lock = threading.Lock()
+_doctors: Dict[Tuple[Optional[int], int], Tuple[float, DoctorRef]] = {}
+_languages: Optional[Tuple[float, FrozenSet[str]]] = None
+
+def _load_doctor(clinic_id: int, user_id: Optional[int]) -> Optional[DoctorRef]:
+    row = None
+    if user_id is not None:
+        # Doctor explicitly linked to the acting user's portal membership
+        from portal.models import ClinicMember
+        row = (ClinicMember.objects
+               .filter(user_id=user_id, clinic_id=clinic_id, is_active=True, doctor__isnull=False)
+               .values_list("doctor_id", "doctor__full_name").first())
+    if row is None:
+        # The clinic's primary doctor, else any linked doctor
+        row = (DoctorClinic.objects.filter(clinic_id=clinic_id)
+               .order_by("-is_primary", "id").values_list("doctor_id", "doctor__full_name").first())
+    return DoctorRef(*row) if row else None
+
+def doctor_for(clinic_id: int, user=None) -> DoctorRef:
+    """The doctor a share from `user` at the clinic is sent as; ValueError if the clinic has none."""
+    user_id = user.pk if getattr(user, "is_authenticated", False) else None
+    key = (user_id, clinic_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _doctors.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    doctor = _load_doctor(clinic_id, user_id)
+    if doctor is None:
+        raise ValueError("No doctor found for clinic")
+    with _lock:
+        _doctors[key] = (now + DIRECTORY_CACHE_TTL, doctor)
+    return doctor
+
+def language_codes() -> FrozenSet[str]:
+    global _languages
+    now = time.monotonic()
+    with _lock:
+        entry = _languages
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    codes = frozenset(Language.objects.values_list("code", flat=True))
+    with _lock:
+        _languages = (now + DIRECTORY_CACHE_TTL, codes)
+    return codes
+
+def invalidate_doctors(clinic_id: Optional[int] = None):
+    with _lock:
+        if clinic_id is None:
+            _doctors.clear()
+            return
+        for key in [k for k in _doctors if k[1] == clinic_id]:
+            del _doctors[key]
+
+def invalidate_languages():
+    global _languages
+    with _lock:
+        _languages = None
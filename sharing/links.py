@@ -0,0 +1,50 @@
+# sharing/links.py
+"""
+URL builders for the patient-facing `sharing` routes.
+
+Listings build one URL per video/subtopic row; instead of running reverse() for
+every row we reverse each route once (with marker arguments) and turn the result
+into a format string. Slugs and tokens are URL-safe by construction, so building
+a URL is plain str.format. The optional ?t=<token> suffix is added only here.
+"""
+from functools import lru_cache
+from typing import Dict, Optional
+
+from django.urls import reverse
+
+_ROUTES = {
+    "resolve": ("sharing:resolve", ("token",)),
+    "home": ("sharing:patient_home", ("slug", "lang")),
+    "subtopic": ("sharing:patient_subtopic", ("slug", "lang", "sub_slug")),
+    "video": ("sharing:patient_video", ("slug", "lang", "vid_slug")),
+}
+
+def _marker(name: str) -> str:
+    return f"zz{name.replace('_', '')}zz"
+
+@lru_cache(maxsize=None)
+def _templates() -> Dict[str, str]:
+    out = {}
+    for key, (route, args) in _ROUTES.items():
+        path = reverse(route, kwargs={a: _marker(a) for a in args})
+        path = path.replace("{", "{{").replace("}", "}}")
+        for a in args:
+            path = path.replace(_marker(a), "{%s}" % a)
+        out[key] = path
+    return out
+
+def with_token(url: str, token: Optional[str]) -> str:
+    return f"{url}?t={token}" if token else url
+
+def share_url(token: str) -> str:
+    """Relative /s/<token>/ entry-point URL."""
+    return _templates()["resolve"].format(token=token)
+
+def home_url(slug: str, lang: str, token: Optional[str] = None) -> str:
+    return with_token(_templates()["home"].format(slug=slug, lang=lang), token)
+
+def subtopic_url(slug: str, lang: str, sub_slug: str, token: Optional[str] = None) -> str:
+    return with_token(_templates()["subtopic"].format(slug=slug, lang=lang, sub_slug=sub_slug), token)
+
+def video_url(slug: str, lang: str, vid_slug: str, token: Optional[str] = None) -> str:
+    return with_token(_templates()["video"].format(slug=slug, lang=lang, vid_slug=vid_slug), token)
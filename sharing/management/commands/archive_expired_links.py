@@ -0,0 +1,91 @@
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import serializers
+from django.core.files import File
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from messaging.models import OutboundMessage
+from sharing.models import ArchivedShareLink, LinkSession, LinkVisit, ShareEvent, ShareLink
+
+class Command(BaseCommand):
+    help = ("Move share links past expires_at + grace (with their event, sessions and visits) out of the hot "
+            "tables into gzipped JSON in the private archive storage (ARCHIVE_ROOT), indexed by ArchivedShareLink. "
+            "See restore_share_link.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-days", type=int, default=getattr(settings, "SHARE_LINK_ARCHIVE_GRACE_DAYS", 30),
+                            help="Days after expires_at before a link is archived")
+        parser.add_argument("--batch", type=int, default=500, help="Links per archive file / transaction")
+        parser.add_argument("--max-batches", type=int, default=0, help="Stop after this many batches (0 = no limit)")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now() - timedelta(days=opts["grace_days"])
+        due = ShareLink.objects.filter(expires_at__lt=cutoff).order_by("id")
+        if opts["dry_run"]:
+            self.stdout.write(f"Would archive {due.count()} link(s) that expired before {cutoff:%Y-%m-%d %H:%M}.")
+            return
+
+        archived = batches = 0
+        last_id = 0
+        while not opts["max_batches"] or batches < opts["max_batches"]:
+            links = list(due.filter(id__gt=last_id)[:opts["batch"]])
+            if not links:
+                break
+            last_id = links[-1].id
+            archived += self._archive(links)
+            batches += 1
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} link(s) in {batches} batch(es)."))
+
+    def _archive(self, links) -> int:
+        ids = [link.id for link in links]
+        events = {e.share_link_id: e for e in ShareEvent.objects.filter(share_link_id__in=ids)}
+        sessions, visits, outbound = {}, {}, {}
+        for s in LinkSession.objects.filter(share_link_id__in=ids).order_by("id"):
+            sessions.setdefault(s.share_link_id, []).append(s)
+        for v in LinkVisit.objects.filter(share_link_id__in=ids).order_by("id"):
+            visits.setdefault(v.share_link_id, []).append(v)
+        for om_id, event_id in OutboundMessage.objects.filter(share_event__in=events.values()).values_list(
+                "id", "share_event_id"):
+            outbound.setdefault(event_id, []).append(om_id)
+
+        # One bundle per token, objects in insert order (link → event → sessions → visits).
+        bundles = {}
+        for link in links:
+            event = events.get(link.id)
+            objs = [link] + ([event] if event else []) + sessions.get(link.id, []) + visits.get(link.id, [])
+            bundles[link.token] = {
+                "objects": serializers.serialize("python", objs),
+                "outbound": outbound.get(event.id, []) if event else [],
+            }
+
+        stamp = timezone.now()
+        path = f"archive/share_links/{stamp:%Y%m%d}/{stamp:%H%M%S}-{ids[0]}-{ids[-1]}.json.gz"
+        with tempfile.TemporaryFile() as tmp:
+            with gzip.GzipFile(fileobj=tmp, mode="wb") as gz:
+                gz.write(json.dumps(bundles, cls=DjangoJSONEncoder).encode("utf-8"))
+            tmp.seek(0)
+            path = storages["archive"].save(path, File(tmp))
+
+        with transaction.atomic():
+            ArchivedShareLink.objects.bulk_create([
+                ArchivedShareLink(token=link.token, link_id=link.id, type=link.type, clinic_id=link.clinic_id,
+                                  language=link.language_id, expires_at=link.expires_at, path=path)
+                for link in links
+            ])
+            LinkVisit.objects.filter(share_link_id__in=ids).delete()
+            LinkSession.objects.filter(share_link_id__in=ids).delete()
+            # Outbound messages are the send log and stay hot; they are re-attached on restore.
+            OutboundMessage.objects.filter(share_event__in=events.values()).update(share_event=None)
+            ShareEvent.objects.filter(share_link_id__in=ids).delete()
+            ShareLink.objects.filter(id__in=ids).delete()
+        self.stdout.write(f"Archived {len(links)} link(s) to {path}")
+        return len(links)
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Min, Sum
+
+from sharing.models import LinkSession, ShareLink
+
+class Command(BaseCommand):
+    help = ("Fill ShareLink.first_visit_at / last_visit_at / visit_count from LinkSession rows for links whose "
+            "counters are still zero (run rollup_link_visits first for pre-session history).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=1000, help="Links per transaction")
+
+    def handle(self, *args, **opts):
+        link_ids = (LinkSession.objects.order_by("share_link_id")
+                    .values_list("share_link_id", flat=True).distinct())
+
+        updated = 0
+        batch = []
+        for link_id in link_ids.iterator():
+            batch.append(link_id)
+            if len(batch) >= opts["batch"]:
+                updated += self._write(batch)
+                batch = []
+        updated += self._write(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Visit counters filled for {updated} link(s)."))
+
+    def _write(self, link_ids) -> int:
+        if not link_ids:
+            return 0
+        with transaction.atomic():
+            # Lock the links first: the visit flusher's F() increments wait for this transaction
+            # instead of being overwritten, and links it has already counted (visit_count > 0)
+            # are skipped.
+            ids = list(ShareLink.objects.select_for_update()
+                       .filter(id__in=link_ids, visit_count=0)
+                       .values_list("id", flat=True))
+            if not ids:
+                return 0
+            totals = (LinkSession.objects
+                      .filter(share_link_id__in=ids)
+                      .values("share_link_id")
+                      .annotate(first=Min("started_at"), last=Max("last_seen_at"),
+                                views=Sum(F("landing_views") + F("home_views") + F("subtopic_views")
+                                          + F("video_views")))
+                      .order_by())
+            links = [ShareLink(id=row["share_link_id"], first_visit_at=row["first"],
+                               last_visit_at=row["last"], visit_count=row["views"] or 0)
+                     for row in totals]
+            ShareLink.objects.bulk_update(links, ["first_visit_at", "last_visit_at", "visit_count"])
+        return len(links)
@@ -0,0 +1,108 @@
+import gzip
+import json
+import tempfile
+from datetime import datetime, time as dt_time, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sharing.models import LinkVisit, unpack_ip
+from sharing.partitions import (
+    add_months, drop_partitions, ensure_partitions, is_supported, month_start, monthly_partitions,
+)
+
+def _aware(d):
+    return datetime.combine(d, dt_time.min, tzinfo=dt_timezone.utc)
+
+class Command(BaseCommand):
+    help = ("Pre-create upcoming monthly LinkVisit partitions and drop (optionally archive) months "
+            "past retention. Without MySQL partitioning, old rows are deleted in batches instead.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=getattr(settings, "LINK_VISIT_PARTITIONS_AHEAD", 3),
+                            help="Months to create beyond the current one")
+        parser.add_argument("--retention-months", type=int,
+                            default=getattr(settings, "LINK_VISIT_RETENTION_MONTHS", 13),
+                            help="Full months to keep before the current one (0 = keep everything)")
+        parser.add_argument("--archive", action="store_true",
+                            help="Write each expired month to the archive storage (ARCHIVE_ROOT) as gzipped JSON lines "
+                                 "before dropping it")
+        parser.add_argument("--batch", type=int, default=5000, help="Rows per DELETE on non-partitioned tables")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        this_month = month_start(timezone.now().date())
+        dry = opts["dry_run"]
+        partitioned = is_supported() and bool(monthly_partitions())
+
+        if partitioned:
+            created = ensure_partitions(add_months(this_month, opts["ahead"]), dry_run=dry)
+            self.stdout.write(f"Partitions created: {', '.join(created) or 'none'}")
+        else:
+            self.stdout.write("sharing_linkvisit is not partitioned; using batched deletes for retention.")
+
+        if opts["retention_months"] <= 0:
+            return
+        cutoff = add_months(this_month, -opts["retention_months"])
+
+        if opts["archive"]:
+            for month in self._months_before(cutoff):
+                self._archive_month(month, dry)
+
+        if partitioned:
+            dropped = drop_partitions(cutoff, dry_run=dry)
+            self.stdout.write(self.style.SUCCESS(f"Partitions dropped before {cutoff}: {', '.join(dropped) or 'none'}"))
+        else:
+            deleted = 0 if dry else self._delete_before(cutoff, opts["batch"])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} visit(s) created before {cutoff}."))
+
+    def _months_before(self, cutoff):
+        oldest = (LinkVisit.objects.filter(created_at__lt=_aware(cutoff))
+                  .order_by("created_at").values_list("created_at", flat=True).first())
+        if oldest is None:
+            return []
+        months, month = [], month_start(oldest.date())
+        while month < cutoff:
+            months.append(month)
+            month = add_months(month, 1)
+        return months
+
+    def _archive_month(self, month, dry: bool):
+        path = f"archive/link_visits/{month:%Y%m}.jsonl.gz"
+        rows = (LinkVisit.objects
+                .filter(created_at__gte=_aware(month), created_at__lt=_aware(add_months(month, 1)))
+                .order_by("id")
+                .values_list("id", "share_link_id", "created_at", "ip", "user_agent__value", "page_kind", "page_ref"))
+        if dry:
+            count = rows.count()
+            if count:
+                self.stdout.write(f"Would archive {count} visit(s) to {path}")
+            return
+        n = 0
+        with tempfile.TemporaryFile() as tmp:
+            with gzip.GzipFile(fileobj=tmp, mode="wb") as gz:
+                for pk, link_id, created_at, ip, ua, kind, ref in rows.iterator(chunk_size=5000):
+                    gz.write(json.dumps({
+                        "id": pk, "share_link_id": link_id, "created_at": created_at.isoformat(),
+                        "ip": unpack_ip(ip), "user_agent": ua, "page_kind": kind, "page_ref": ref,
+                    }).encode("utf-8") + b"\n")
+                    n += 1
+            if not n:
+                return
+            tmp.seek(0)
+            storages["archive"].delete(path)
+            storages["archive"].save(path, File(tmp))
+        self.stdout.write(f"Archived {n} visit(s) to {path}")
+
+    def _delete_before(self, cutoff, batch: int) -> int:
+        old = LinkVisit.objects.filter(created_at__lt=_aware(cutoff))
+        deleted = 0
+        while True:
+            ids = list(old.order_by("id").values_list("id", flat=True)[:batch])
+            if not ids:
+                return deleted
+            LinkVisit.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
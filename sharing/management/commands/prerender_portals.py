@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from clinics.models import Clinic
+from core.models import Language
+from sharing.catalog import get_catalog
+from sharing.prerender import prerender_clinic
+
+class Command(BaseCommand):
+    help = "Pre-render clinic portal pages (home/subtopic/video × active languages) into file storage. Incremental unless --force."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clinic", action="append", default=[], help="portal_slug (repeatable); default all clinics")
+        parser.add_argument("--clinic-id", type=int, default=None)
+        parser.add_argument("--lang", action="append", default=[], help="language code (repeatable); default all active")
+        parser.add_argument("--force", action="store_true", help="Re-render pages even if fresh")
+
+    def handle(self, *args, **opts):
+        clinics = Clinic.objects.order_by("id")
+        if opts["clinic"]:
+            clinics = clinics.filter(portal_slug__in=opts["clinic"])
+        if opts["clinic_id"]:
+            clinics = clinics.filter(id=opts["clinic_id"])
+
+        langs = opts["lang"] or list(Language.objects.filter(is_active=True).values_list("code", flat=True))
+        catalogs = [get_catalog(code) for code in langs]
+
+        total_written = total_skipped = 0
+        for clinic in clinics.iterator():
+            written, skipped = prerender_clinic(clinic, catalogs, force=opts["force"])
+            total_written += written
+            total_skipped += skipped
+            if written:
+                self.stdout.write(f"{clinic.portal_slug}: {written} page(s) rendered, {skipped} fresh")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pre-render complete: {total_written} rendered, {total_skipped} already fresh."))
@@ -0,0 +1,53 @@
+import gzip
+import json
+from datetime import timedelta
+
+from django.core import serializers
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from messaging.models import OutboundMessage
+from sharing.models import ArchivedShareLink, ShareEvent, ShareLink
+
+class Command(BaseCommand):
+    help = "Bring an archived share link (with its event, sessions and visits) back into the hot tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("token")
+        parser.add_argument("--expires-in-days", type=int, default=None,
+                            help="New expiry from now (0 = never expires); by default the old expires_at is kept")
+
+    def handle(self, *args, **opts):
+        token = opts["token"]
+        entry = ArchivedShareLink.objects.filter(token=token).first()
+        if entry is None:
+            raise CommandError(f"No archived link with token {token!r}")
+        try:
+            with storages["archive"].open(entry.path, "rb") as fh:
+                bundle = json.loads(gzip.decompress(fh.read()))[token]
+        except (OSError, KeyError, ValueError) as exc:
+            raise CommandError(f"Cannot read {token!r} from {entry.path}: {exc}")
+
+        with transaction.atomic():
+            event_id = None
+            for obj in serializers.deserialize("python", bundle["objects"]):
+                obj.save()
+                if isinstance(obj.object, ShareEvent):
+                    event_id = obj.object.pk
+            if event_id and bundle["outbound"]:
+                OutboundMessage.objects.filter(id__in=bundle["outbound"], share_event__isnull=True).update(
+                    share_event_id=event_id)
+            if opts["expires_in_days"] is not None:
+                days = opts["expires_in_days"]
+                ShareLink.objects.filter(pk=entry.link_id).update(
+                    expires_at=timezone.now() + timedelta(days=days) if days else None)
+            entry.delete()
+
+        link = ShareLink.objects.get(pk=entry.link_id)
+        self.stdout.write(self.style.SUCCESS(f"Restored {link} ({len(bundle['objects'])} row(s))."))
+        if link.expires_at and link.expires_at <= timezone.now():
+            self.stdout.write(self.style.WARNING(
+                "The link is still expired; pass --expires-in-days to reactivate it, "
+                "or the next archive_expired_links run will archive it again."))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from sharing.models import LinkSession, LinkVisit, unpack_ip
+from sharing.visits import client_fingerprint, sessionize
+
+# LinkVisit.page_kind → session counter; anything else counts as a landing
+_KINDS = {LinkVisit.PAGE_HOME: "home", LinkVisit.PAGE_SUBTOPIC: "subtopic", LinkVisit.PAGE_VIDEO: "video"}
+
+class Command(BaseCommand):
+    help = ("Roll historical LinkVisit rows up into LinkSession rows. Links that already have "
+            "sessions are skipped unless --rebuild; --purge deletes the raw rows afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Only visits from the last N days (default all)")
+        parser.add_argument("--rebuild", action="store_true", help="Replace existing sessions of the links processed")
+        parser.add_argument("--purge", action="store_true", help="Delete the rolled-up LinkVisit rows")
+        parser.add_argument("--batch", type=int, default=1000, help="Links per transaction")
+
+    def handle(self, *args, **opts):
+        visits = LinkVisit.objects.all()
+        if opts["days"]:
+            visits = visits.filter(created_at__gte=timezone.now() - timezone.timedelta(days=opts["days"]))
+
+        link_ids = list(visits.order_by("share_link_id").values_list("share_link_id", flat=True).distinct())
+        if not opts["rebuild"]:
+            done = set(LinkSession.objects.filter(share_link_id__in=link_ids)
+                       .values_list("share_link_id", flat=True).distinct())
+            link_ids = [i for i in link_ids if i not in done]
+
+        n_sessions = n_visits = 0
+        step = max(opts["batch"], 1)
+        for i in range(0, len(link_ids), step):
+            chunk = link_ids[i:i + step]
+            rows = (visits.filter(share_link_id__in=chunk)
+                    .order_by("created_at", "id")
+                    .values_list("share_link_id", "ip", "user_agent__value", "page_kind", "created_at"))
+            views = [(link_id, client_fingerprint(unpack_ip(ip), ua), _KINDS.get(kind, "landing"), seen_at)
+                     for link_id, ip, ua, kind, seen_at in rows.iterator()]
+
+            created, _ = sessionize(views, {})
+            with transaction.atomic():
+                if opts["rebuild"]:
+                    LinkSession.objects.filter(share_link_id__in=chunk).delete()
+                LinkSession.objects.bulk_create(created, batch_size=500)
+                if opts["purge"]:
+                    visits.filter(share_link_id__in=chunk).delete()
+            n_sessions += len(created)
+            n_visits += len(views)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {n_visits} visit(s) from {len(link_ids)} link(s) into {n_sessions} session(s)."))
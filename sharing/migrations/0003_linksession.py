@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "sharing",
+            "0002_remove_shareevent_campaign_remove_sharelink_campaign_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LinkSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("fingerprint", models.CharField(max_length=40)),
+                ("started_at", models.DateTimeField()),
+                ("last_seen_at", models.DateTimeField()),
+                ("landing_views", models.PositiveIntegerField(default=0)),
+                ("home_views", models.PositiveIntegerField(default=0)),
+                ("subtopic_views", models.PositiveIntegerField(default=0)),
+                ("video_views", models.PositiveIntegerField(default=0)),
+                (
+                    "share_link",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sessions",
+                        to="sharing.sharelink",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["share_link", "fingerprint", "last_seen_at"],
+                        name="sharing_lin_share_l_abf2fc_idx",
+                    ),
+                    models.Index(
+                        fields=["last_seen_at"], name="sharing_lin_last_se_a03895_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
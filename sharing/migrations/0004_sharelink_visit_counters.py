@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sharing", "0003_linksession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sharelink",
+            name="first_visit_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="sharelink",
+            name="last_visit_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="sharelink",
+            name="visit_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sharing", "0004_sharelink_visit_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sharelink",
+            name="preview_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
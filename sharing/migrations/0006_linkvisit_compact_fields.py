@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sharing", "0005_sharelink_preview_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserAgent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ua_hash", models.CharField(max_length=40, unique=True)),
+                ("value", models.TextField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="linkvisit",
+            name="ip_packed",
+            field=models.BinaryField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AddField(
+            model_name="linkvisit",
+            name="page_kind",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, "other"),
+                    (1, "landing"),
+                    (2, "home"),
+                    (3, "subtopic"),
+                    (4, "video"),
+                ],
+                default=0,
+            ),
+        ),
+        migrations.AddField(
+            model_name="linkvisit",
+            name="page_ref",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="linkvisit",
+            name="ua",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="sharing.useragent",
+            ),
+        ),
+    ]
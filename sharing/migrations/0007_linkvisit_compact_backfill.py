@@ -0,0 +1,108 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:05
+
+import hashlib
+import ipaddress
+
+from django.db import migrations
+
+BATCH = 2000
+
+# Mirrors LinkVisit.PAGE_* (0 other, 1 landing, 2 home, 3 subtopic, 4 video)
+_KINDS = {"home": 2, "subtopic": 3, "video": 4}
+
+
+def _pack(ip):
+    try:
+        return ipaddress.ip_address(ip).packed if ip else None
+    except ValueError:
+        return None
+
+
+def forwards(apps, schema_editor):
+    LinkVisit = apps.get_model("sharing", "LinkVisit")
+    UserAgent = apps.get_model("sharing", "UserAgent")
+    Subtopic = apps.get_model("content", "Subtopic")
+    Video = apps.get_model("content", "Video")
+
+    refs = {
+        3: dict(Subtopic.objects.values_list("slug", "id")),
+        4: dict(Video.objects.values_list("slug", "id")),
+    }
+    ua_ids = dict(UserAgent.objects.values_list("ua_hash", "id"))
+
+    last_id = 0
+    while True:
+        rows = list(
+            LinkVisit.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "ip", "user_agent", "referer")[:BATCH]
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        new_uas = {}
+        for v in rows:
+            ua = v.user_agent or ""
+            if ua:
+                h = hashlib.sha1(ua.encode("utf-8")).hexdigest()
+                if h not in ua_ids:
+                    new_uas[h] = ua
+        if new_uas:
+            UserAgent.objects.bulk_create(
+                [UserAgent(ua_hash=h, value=ua) for h, ua in new_uas.items()],
+                ignore_conflicts=True,
+            )
+            ua_ids.update(
+                UserAgent.objects.filter(ua_hash__in=list(new_uas)).values_list(
+                    "ua_hash", "id"
+                )
+            )
+
+        for v in rows:
+            ref = v.referer or ""
+            kind, page_ref = 0, None
+            if ref == "token:landing":
+                kind = 1
+            elif ref.startswith("internal:"):
+                parts = ref.split(":", 2)
+                kind = _KINDS.get(parts[1], 0)
+                if kind in refs and len(parts) == 3:
+                    page_ref = refs[kind].get(parts[2])
+            ua = v.user_agent or ""
+            v.ip_packed = _pack(v.ip)
+            v.ua_id = ua_ids.get(hashlib.sha1(ua.encode("utf-8")).hexdigest()) if ua else None
+            v.page_kind = kind
+            v.page_ref = page_ref
+        LinkVisit.objects.bulk_update(rows, ["ip_packed", "ua", "page_kind", "page_ref"])
+
+
+def backwards(apps, schema_editor):
+    LinkVisit = apps.get_model("sharing", "LinkVisit")
+    Subtopic = apps.get_model("content", "Subtopic")
+    Video = apps.get_model("content", "Video")
+    slugs = {
+        3: dict(Subtopic.objects.values_list("id", "slug")),
+        4: dict(Video.objects.values_list("id", "slug")),
+    }
+    names = {1: "token:landing", 2: "internal:home", 3: "internal:subtopic", 4: "internal:video"}
+    for v in LinkVisit.objects.select_related("ua").iterator(chunk_size=BATCH):
+        v.ip = str(ipaddress.ip_address(bytes(v.ip_packed))) if v.ip_packed else None
+        v.user_agent = v.ua.value if v.ua_id else ""
+        v.referer = names.get(v.page_kind, "")
+        slug = slugs.get(v.page_kind, {}).get(v.page_ref)
+        if slug:
+            v.referer = f"{v.referer}:{slug}"
+        v.save(update_fields=["ip", "user_agent", "referer"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0003_videoi18n_youtube_id"),
+        ("sharing", "0006_linkvisit_compact_fields"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
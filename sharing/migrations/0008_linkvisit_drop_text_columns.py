@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sharing", "0007_linkvisit_compact_backfill"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="linkvisit",
+            name="ip",
+        ),
+        migrations.RemoveField(
+            model_name="linkvisit",
+            name="referer",
+        ),
+        migrations.RemoveField(
+            model_name="linkvisit",
+            name="user_agent",
+        ),
+        migrations.RenameField(
+            model_name="linkvisit",
+            old_name="ip_packed",
+            new_name="ip",
+        ),
+        migrations.RenameField(
+            model_name="linkvisit",
+            old_name="ua",
+            new_name="user_agent",
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:59
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TABLE = "sharing_linkvisit"
+MONTHS_AHEAD = 3
+
+
+def _add_months(d, n):
+    months = d.year * 12 + d.month - 1 + n
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def partition(apps, schema_editor):
+    """MySQL only: PK (id, created_at) and one RANGE partition per month."""
+    if schema_editor.connection.vendor != "mysql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT MIN(created_at) FROM {TABLE}")
+        oldest = cursor.fetchone()[0] or date.today()
+    month = date(oldest.year, oldest.month, 1)
+    last = _add_months(date.today().replace(day=1), MONTHS_AHEAD)
+    clauses = []
+    while month <= last:
+        upper = _add_months(month, 1)
+        clauses.append(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))"
+        )
+        month = upper
+    clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    schema_editor.execute(
+        f"ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)"
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {TABLE} PARTITION BY RANGE (TO_DAYS(created_at)) ({', '.join(clauses)})"
+    )
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute(f"ALTER TABLE {TABLE} REMOVE PARTITIONING")
+    schema_editor.execute(f"ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sharing", "0008_linkvisit_drop_text_columns"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="linkvisit",
+            name="share_link",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="visits",
+                to="sharing.sharelink",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="linkvisit",
+            name="user_agent",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="sharing.useragent",
+            ),
+        ),
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -2,6 +2,9 @@
 from django.db import models
 from django.core.validators import RegexValidator
 from core.models import TimeStampedModel, Language
+from .tokens import make_token, signed_tokens_enabled
+import hashlib
+import ipaddress
 import secrets
 
 def _token(n=22):
@@ -20,9 +23,23 @@ class ShareLink(TimeStampedModel):
     subtopic  = models.ForeignKey("content.Subtopic", on_delete=models.PROTECT, null=True, blank=True)
     expires_at = models.DateTimeField(null=True, blank=True)
 
+    # Engagement counters, maintained by sharing.visits at flush time
+    first_visit_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_visit_at  = models.DateTimeField(null=True, blank=True)
+    visit_count    = models.PositiveIntegerField(default=0)
+    preview_count  = models.PositiveIntegerField(default=0)  # link-preview crawler fetches, not visits
+
     class Meta:
         indexes = [models.Index(fields=["type", "clinic", "language"])]
 
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        super().save(*args, **kwargs)
+        if creating and signed_tokens_enabled():
+            # Signed tokens embed the pk, so they can only be minted after the INSERT.
+            self.token = make_token(self.pk, self.type)
+            ShareLink.objects.filter(pk=self.pk).update(token=self.token)
+
     def __str__(self):
         return f"{self.type}:{self.token}"
 
@@ -45,9 +62,86 @@ class ShareEvent(TimeStampedModel):
     channel   = models.CharField(max_length=16, choices=CHANNEL_CHOICES, default="whatsapp")
     message_preview = models.TextField(blank=True, null=True)
 
+def pack_ip(ip):
+    """'1.2.3.4' / '::1' → 4 / 16 raw bytes (None if empty or invalid)."""
+    try:
+        return ipaddress.ip_address(ip).packed if ip else None
+    except ValueError:
+        return None
+
+def unpack_ip(raw):
+    return str(ipaddress.ip_address(bytes(raw))) if raw else None
+
+class UserAgent(models.Model):
+    """Interned User-Agent strings; LinkVisit rows point here instead of repeating the text."""
+    ua_hash = models.CharField(max_length=40, unique=True)  # sha1 of value
+    value   = models.TextField()
+
+    @staticmethod
+    def hash_for(value: str) -> str:
+        return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+    def __str__(self):
+        return self.value[:80]
+
 class LinkVisit(TimeStampedModel):
-    share_link = models.ForeignKey(ShareLink, on_delete=models.CASCADE, related_name="visits")
+    PAGE_OTHER, PAGE_LANDING, PAGE_HOME, PAGE_SUBTOPIC, PAGE_VIDEO = range(5)
+    PAGE_KIND_CHOICES = [
+        (PAGE_OTHER, "other"), (PAGE_LANDING, "landing"), (PAGE_HOME, "home"),
+        (PAGE_SUBTOPIC, "subtopic"), (PAGE_VIDEO, "video"),
+    ]
+
+    # Partitioned by month of created_at on MySQL (sharing.partitions): no FK constraints there.
+    share_link = models.ForeignKey(ShareLink, on_delete=models.CASCADE, related_name="visits", db_constraint=False)
     visited_at = models.DateTimeField(auto_now_add=True, db_index=True)
-    ip         = models.GenericIPAddressField(null=True, blank=True)
-    user_agent = models.TextField(blank=True, null=True)
-    referer    = models.TextField(blank=True, null=True)
+    ip         = models.BinaryField(max_length=16, null=True, blank=True)  # pack_ip()
+    user_agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, null=True, blank=True, related_name="+",
+                                   db_constraint=False)
+    page_kind  = models.PositiveSmallIntegerField(choices=PAGE_KIND_CHOICES, default=PAGE_OTHER)
+    page_ref   = models.PositiveIntegerField(null=True, blank=True)  # Subtopic / Video id for those kinds
+
+    @property
+    def ip_address(self):
+        return unpack_ip(self.ip)
+
+class LinkSession(TimeStampedModel):
+    """
+    One browsing session per (link, client fingerprint, SESSION_WINDOW of inactivity).
+    Replaces one LinkVisit row per page view; see sharing.visits.
+    """
+    share_link  = models.ForeignKey(ShareLink, on_delete=models.CASCADE, related_name="sessions")
+    fingerprint = models.CharField(max_length=40)  # sha1(ip | user agent)
+    started_at  = models.DateTimeField()
+    last_seen_at = models.DateTimeField()
+    landing_views  = models.PositiveIntegerField(default=0)
+    home_views     = models.PositiveIntegerField(default=0)
+    subtopic_views = models.PositiveIntegerField(default=0)
+    video_views    = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["share_link", "fingerprint", "last_seen_at"]),
+            models.Index(fields=["last_seen_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.share_link_id}:{self.fingerprint[:8]}@{self.started_at:%Y-%m-%d %H:%M}"
+
+class ArchivedShareLink(models.Model):
+    """
+    Index of links moved to cold storage by `archive_expired_links`: the link, its
+    event, sessions and visits live in the gzipped JSON file at `path` (in
+    storages["archive"], ARCHIVE_ROOT) until `restore_share_link` brings them back. Lets /s/<token>/ keep
+    answering with the clinic-branded expired page.
+    """
+    token       = models.CharField(max_length=32, unique=True)
+    link_id     = models.BigIntegerField()  # original ShareLink pk, reused on restore
+    type        = models.CharField(max_length=16, choices=ShareLink.TYPE_CHOICES)
+    clinic      = models.ForeignKey("clinics.Clinic", on_delete=models.CASCADE, related_name="+")
+    language    = models.CharField(max_length=8)
+    expires_at  = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    path        = models.CharField(max_length=255)
+
+    def __str__(self):
+        return f"{self.type}:{self.token} (archived)"
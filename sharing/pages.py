@@ -0,0 +1,141 @@
+# sharing/pages.py
+"""
+Context builders for the patient pages (home | subtopic | video).
+
+Shared by the browsing views, ShareLinkView and the static pre-renderer so all of
+them produce the same HTML for a given (clinic, language, catalog). `clinic` may
+be a Clinic or a resolver ClinicBrand; only branding attributes are read.
+"""
+import hashlib
+from functools import lru_cache
+from typing import Dict
+
+from django.http import Http404
+from django.template.loader import get_template
+from django.templatetags.static import static
+
+from .catalog import Catalog, SubtopicEntry, VideoEntry
+from .links import home_url, subtopic_url, video_url
+from .utils import ui_label
+
+PAGE_TEMPLATES = {
+    "home": "sharing/patient_home.html",
+    "subtopic": "sharing/patient_subtopic.html",
+    "video": "sharing/patient_video.html",
+}
+_ALL_TEMPLATES = ("sharing/patient_base.html",) + tuple(PAGE_TEMPLATES.values())
+
+@lru_cache(maxsize=None)
+def templates_revision() -> str:
+    """Hash of the patient templates and stylesheet URL; part of every page validator/fingerprint."""
+    h = hashlib.sha1()
+    for name in _ALL_TEMPLATES:
+        h.update(get_template(name).template.source.encode("utf-8"))
+    h.update(static("sharing/patient.css").encode("utf-8"))  # hashed name changes with the CSS
+    return h.hexdigest()[:12]
+
+def home_context(clinic, catalog: Catalog) -> Dict:
+    lang = catalog.lang
+    listing = []
+    for s in catalog.active_subtopics():
+        listing.append({"name": s.name, "thumb": s.thumb, "url": subtopic_url(clinic.portal_slug, lang, s.slug)})
+    return {
+        "page_type": "home",
+        "visit_kind": "home",
+        "clinic": clinic,
+        "lang": lang,
+        "labels": {"subtopics": ui_label("subtopics", lang)},
+        "subtopics": listing,
+        "home_url": home_url(clinic.portal_slug, lang),
+    }
+
+def expired_context(clinic, lang: str) -> Dict:
+    """Expired / archived share link: branding plus a way into the clinic's pages."""
+    return {
+        "page_type": "expired",
+        "clinic": clinic,
+        "lang": lang,
+        "labels": {
+            "link_expired": ui_label("link_expired", lang),
+            "for_more_videos": ui_label("for_more_videos", lang),
+        },
+        "home_url": home_url(clinic.portal_slug, lang),
+    }
+
+def subtopic_context(clinic, catalog: Catalog, subtopic: SubtopicEntry) -> Dict:
+    lang = catalog.lang
+    listing = []
+    for v in catalog.videos_for(subtopic):
+        listing.append({"title": v.title, "thumb": v.thumb, "url": video_url(clinic.portal_slug, lang, v.slug)})
+    return {
+        "page_type": "subtopic",
+        "visit_kind": "subtopic",
+        "visit_slug": subtopic.slug,
+        "clinic": clinic,
+        "lang": lang,
+        "labels": {
+            "for_more_videos": ui_label("for_more_videos", lang),
+            "subtopics": ui_label("subtopics", lang),
+            "back_to_home": ui_label("back_to_home", lang),
+        },
+        "subtopic": subtopic,
+        "subtopic_name": subtopic.name,
+        "subtopic_thumb": subtopic.thumb,
+        "videos": listing,
+        "home_url": home_url(clinic.portal_slug, lang),
+    }
+
+def video_context(clinic, catalog: Catalog, video: VideoEntry) -> Dict:
+    lang = catalog.lang
+    subtopic = catalog.subtopic(video.subtopic_slug)
+    return {
+        "page_type": "video",
+        "visit_kind": "video",
+        "visit_slug": video.slug,
+        "clinic": clinic,
+        "lang": lang,
+        "labels": {
+            "for_more_videos": ui_label("for_more_videos", lang),
+            "back_to_home": ui_label("back_to_home", lang),
+        },
+        "video": video,
+        "video_title": video.title,
+        "video_thumb": video.thumb,
+        "youtube_id": video.youtube_id,
+        "subtopic": subtopic,
+        "subtopic_name": subtopic.name,
+        # "For more videos" → subtopic page
+        "more_url": subtopic_url(clinic.portal_slug, lang, subtopic.slug),
+        "home_url": home_url(clinic.portal_slug, lang),
+    }
+
+def page_context(clinic, catalog: Catalog, kind: str, slug: str = "") -> Dict:
+    """Context for one page; raises Http404 for unknown slugs."""
+    if kind == "subtopic":
+        subtopic = catalog.subtopic(slug)
+        if subtopic is None:
+            raise Http404("Subtopic not found")
+        return subtopic_context(clinic, catalog, subtopic)
+    if kind == "video":
+        video = catalog.video(slug)
+        if video is None:
+            raise Http404("Video not found")
+        return video_context(clinic, catalog, video)
+    return home_context(clinic, catalog)
+
+def page_fingerprint(clinic, catalog: Catalog, kind: str, slug: str = "") -> str:
+    """
+    Hash of everything a page's HTML is derived from: templates, clinic branding and
+    only the catalog entries that page shows, so unrelated edits keep it stable.
+    """
+    if kind == "subtopic":
+        subtopic = catalog.subtopic(slug)
+        data = (subtopic, tuple(catalog.videos_for(subtopic))) if subtopic else None
+    elif kind == "video":
+        video = catalog.video(slug)
+        data = (video, catalog.subtopic(video.subtopic_slug)) if video else None
+    else:
+        data = tuple((s.slug, s.name, s.thumb) for s in catalog.active_subtopics())
+    brand = (clinic.portal_slug, clinic.name, clinic.address, clinic.logo_url, clinic.primary_color)
+    raw = repr((templates_revision(), catalog.lang, kind, slug, brand, data))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
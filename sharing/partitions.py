@@ -0,0 +1,80 @@
+# sharing/partitions.py
+"""
+Monthly RANGE partitioning of sharing_linkvisit on MySQL.
+
+The table is partitioned by TO_DAYS(created_at) with one partition per calendar
+month (pYYYYMM, upper bound = first day of the next month) plus a catch-all
+`pmax`. Queries that filter LinkVisit.created_at only touch the months they
+cover. MySQL requires the partitioning column in every unique key, so the
+primary key is (id, created_at) and LinkVisit's foreign keys carry no DB
+constraint (see migration 0009).
+
+On other backends (SQLite in tests and local runs) the table stays a plain
+table; retention there falls back to batched DELETEs.
+"""
+from datetime import date
+from typing import List, Tuple
+
+from django.db import connection
+
+TABLE = "sharing_linkvisit"
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+def add_months(d: date, n: int) -> date:
+    months = d.year * 12 + d.month - 1 + n
+    return date(months // 12, months % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+def partition_clause(month: date) -> str:
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{add_months(month, 1):%Y-%m-%d}'))"
+
+def is_supported() -> bool:
+    return connection.vendor == "mysql"
+
+def existing_partitions() -> List[Tuple[str, str]]:
+    """[(name, LESS THAN expression)] in partition order; empty if the table isn't partitioned."""
+    if not is_supported():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            [TABLE],
+        )
+        return list(cursor.fetchall())
+
+def monthly_partitions() -> List[date]:
+    months = []
+    for name, _ in existing_partitions():
+        if name.startswith("p") and name[1:].isdigit() and len(name) == 7:
+            months.append(date(int(name[1:5]), int(name[5:7]), 1))
+    return months
+
+def ensure_partitions(until: date, dry_run: bool = False) -> List[str]:
+    """Split `pmax` so that every month up to and including `until` has its own partition."""
+    months = monthly_partitions()
+    if not months:
+        return []
+    wanted = []
+    month = add_months(max(months), 1)
+    while month <= month_start(until):
+        wanted.append(month)
+        month = add_months(month, 1)
+    if wanted and not dry_run:
+        clauses = ", ".join([partition_clause(m) for m in wanted] + ["PARTITION pmax VALUES LESS THAN MAXVALUE"])
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {TABLE} REORGANIZE PARTITION pmax INTO ({clauses})")
+    return [partition_name(m) for m in wanted]
+
+def drop_partitions(before: date, dry_run: bool = False) -> List[str]:
+    """Drop the monthly partitions that end on or before `before` (instant, no row-by-row delete)."""
+    doomed = [partition_name(m) for m in monthly_partitions() if add_months(m, 1) <= month_start(before)]
+    if doomed and not dry_run:
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {TABLE} DROP PARTITION {', '.join(doomed)}")
+    return doomed
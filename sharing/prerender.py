@@ -0,0 +1,111 @@
+# sharing/prerender.py
+"""
+Static pre-rendering of clinic portals into file storage.
+
+Each page (home | subtopic | video) of every Clinic × active Language is rendered
+to <PRERENDER_ROOT>/<portal_slug>/<lang>/[subtopic|video/<slug>/]index.html, a
+layout that mirrors /p/... so WhiteNoise or a front proxy can serve it directly.
+The first line of each file records the page fingerprint (sharing.pages), which
+makes re-rendering incremental and lets the views serve a file only while it is
+still fresh; anything missing or stale falls back to dynamic rendering.
+index.html.gz (and .br when brotli is installed) are written next to each page
+for servers that pick precompressed siblings (gzip_static / WhiteNoise).
+"""
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+
+from core.middleware.compression import ENCODINGS, encode_body
+from .catalog import Catalog
+from .pages import PAGE_TEMPLATES, page_context, page_fingerprint
+
+logger = logging.getLogger(__name__)
+
+PRERENDER_ENABLED = getattr(settings, "PRERENDER_PORTALS", False)
+PRERENDER_ROOT = getattr(settings, "PRERENDER_ROOT", "portals").strip("/")
+PRERENDER_DELAY = getattr(settings, "PRERENDER_DELAY", 30)  # seconds; debounces admin edit bursts
+
+def _marker(fingerprint: str) -> bytes:
+    return f"<!-- prerender:{fingerprint} -->\n".encode("ascii")
+
+def page_path(portal_slug: str, lang: str, kind: str, slug: str = "") -> str:
+    base = f"{PRERENDER_ROOT}/{portal_slug}/{lang}"
+    if kind == "home":
+        return f"{base}/index.html"
+    return f"{base}/{kind}/{slug}/index.html"
+
+def catalog_pages(catalog: Catalog) -> List[Tuple[str, str]]:
+    """(kind, slug) for every page reachable from the portal listings."""
+    pages = [("home", "")]
+    for s in catalog.active_subtopics():
+        pages.append(("subtopic", s.slug))
+        pages.extend(("video", v.slug) for v in catalog.videos_for(s))
+    return pages
+
+def load_page(clinic, catalog: Catalog, kind: str, slug: str = "") -> Optional[bytes]:
+    """Pre-rendered HTML for the page if it exists and is fresh, else None."""
+    mark = _marker(page_fingerprint(clinic, catalog, kind, slug))
+    try:
+        with default_storage.open(page_path(clinic.portal_slug, catalog.lang, kind, slug), "rb") as fh:
+            data = fh.read()
+    except (FileNotFoundError, OSError):
+        return None
+    return data[len(mark):] if data.startswith(mark) else None
+
+def _stored_marker(path: str, size: int) -> bytes:
+    try:
+        with default_storage.open(path, "rb") as fh:
+            return fh.read(size)
+    except (FileNotFoundError, OSError):
+        return b""
+
+def publish_page(clinic, catalog: Catalog, kind: str, slug: str = "", force: bool = False) -> bool:
+    """Render and store one page unless the stored copy is already fresh. Returns True if written."""
+    mark = _marker(page_fingerprint(clinic, catalog, kind, slug))
+    path = page_path(clinic.portal_slug, catalog.lang, kind, slug)
+    if not force and _stored_marker(path, len(mark)) == mark:
+        return False
+
+    html = render_to_string(PAGE_TEMPLATES[kind], page_context(clinic, catalog, kind, slug))
+    data = mark + html.encode("utf-8")
+    _store(path, data)
+    for enc in ENCODINGS:
+        _store(f"{path}.{_SUFFIX[enc]}", encode_body(data, enc, best=True))
+    return True
+
+_SUFFIX = {"gzip": "gz", "br": "br"}
+
+def _store(path: str, data: bytes):
+    default_storage.delete(path)
+    default_storage.save(path, ContentFile(data))
+
+def prerender_clinic(clinic, catalogs: Iterable[Catalog], force: bool = False) -> Tuple[int, int]:
+    written = skipped = 0
+    for catalog in catalogs:
+        for kind, slug in catalog_pages(catalog):
+            if publish_page(clinic, catalog, kind, slug, force=force):
+                written += 1
+            else:
+                skipped += 1
+    return written, skipped
+
+def schedule_prerender(clinic_id: Optional[int] = None):
+    """
+    Queue an incremental pre-render (one clinic, or all clinics when None).
+    Bursts of edits within PRERENDER_DELAY collapse into a single task.
+    """
+    if not PRERENDER_ENABLED:
+        return
+    from .tasks import prerender_portals_task
+
+    if not cache.add(f"prerender:pending:{clinic_id or 'all'}", 1, timeout=PRERENDER_DELAY):
+        return
+    try:
+        prerender_portals_task.apply_async(kwargs={"clinic_id": clinic_id}, countdown=PRERENDER_DELAY)
+    except Exception:
+        logger.exception("Could not enqueue prerender_portals_task")
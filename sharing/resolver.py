@@ -0,0 +1,175 @@
+# sharing/resolver.py
+"""
+Token → link resolution for /s/<token>/ with an in-process LRU + TTL cache.
+
+A hit returns a compact, immutable ResolvedLink (type, language, clinic branding,
+video/subtopic ids and slugs) without touching the DB; a miss costs one query
+(two when the token is not a live link).
+Unknown tokens are cached briefly too, so bots probing random tokens stop
+reaching MySQL. Entries are dropped when the link or its clinic is saved or
+deleted (sharing.signals).
+
+Expired links still resolve (the view answers them with the expired page), and
+so do links moved to cold storage by `archive_expired_links`: a miss on
+ShareLink falls back to the ArchivedShareLink index and yields an `archived`
+ResolvedLink carrying just the clinic branding and language.
+
+Signed tokens (sharing.tokens) are verified first: forged ones never reach the
+cache or the DB, valid ones are loaded by primary key.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ArchivedShareLink, ShareLink
+from .tokens import is_signed, parse_token
+
+TOKEN_CACHE_SIZE = getattr(settings, "SHARE_TOKEN_CACHE_SIZE", 20000)
+TOKEN_CACHE_TTL = getattr(settings, "SHARE_TOKEN_CACHE_TTL", 300)  # seconds
+TOKEN_NEGATIVE_TTL = getattr(settings, "SHARE_TOKEN_NEGATIVE_TTL", 30)
+
+@dataclass(frozen=True)
+class ClinicBrand:
+    id: int
+    portal_slug: str
+    name: str
+    address: str
+    logo_url: Optional[str]
+    primary_color: str
+    updated_at: datetime
+
+@dataclass(frozen=True)
+class ResolvedLink:
+    id: int
+    token: str
+    type: str
+    language: str
+    clinic: ClinicBrand
+    video_id: Optional[int]
+    video_slug: Optional[str]
+    subtopic_id: Optional[int]
+    subtopic_slug: Optional[str]
+    expires_at: Optional[datetime]
+    archived: bool = False
+
+    def is_expired(self, now: Optional[datetime] = None) -> bool:
+        if self.archived:
+            return True
+        return self.expires_at is not None and self.expires_at <= (now or timezone.now())
+
+_FIELDS = (
+    "id", "token", "type", "language_id", "expires_at",
+    "clinic_id", "clinic__portal_slug", "clinic__name", "clinic__address",
+    "clinic__logo_url", "clinic__primary_color", "clinic__updated_at",
+    "video_id", "video__slug", "subtopic_id", "subtopic__slug",
+)
+_ARCHIVED_FIELDS = (
+    "link_id", "token", "type", "language", "expires_at",
+    "clinic_id", "clinic__portal_slug", "clinic__name", "clinic__address",
+    "clinic__logo_url", "clinic__primary_color", "clinic__updated_at",
+)
+
+def _brand(row) -> ClinicBrand:
+    return ClinicBrand(
+        id=row["clinic_id"], portal_slug=row["clinic__portal_slug"], name=row["clinic__name"],
+        address=row["clinic__address"], logo_url=row["clinic__logo_url"],
+        primary_color=row["clinic__primary_color"], updated_at=row["clinic__updated_at"],
+    )
+
+def _load_archived(token: str) -> Optional[ResolvedLink]:
+    row = ArchivedShareLink.objects.filter(token=token).values(*_ARCHIVED_FIELDS).first()
+    if row is None:
+        return None
+    return ResolvedLink(
+        id=row["link_id"], token=row["token"], type=row["type"], language=row["language"],
+        clinic=_brand(row), video_id=None, video_slug=None, subtopic_id=None, subtopic_slug=None,
+        expires_at=row["expires_at"], archived=True,
+    )
+
+def _load(token: str) -> Optional[ResolvedLink]:
+    if is_signed(token):
+        parsed = parse_token(token)
+        if parsed is None:
+            return None
+        pk, link_type = parsed
+        row = ShareLink.objects.filter(pk=pk).values(*_FIELDS).first()
+        # The stored token must still be this one (links can be re-issued).
+        if row is not None and (row["token"] != token or row["type"] != link_type):
+            return None
+    else:
+        row = ShareLink.objects.filter(token=token).values(*_FIELDS).first()
+    if row is None:
+        return _load_archived(token)
+    return ResolvedLink(
+        id=row["id"], token=row["token"], type=row["type"], language=row["language_id"],
+        clinic=_brand(row),
+        video_id=row["video_id"], video_slug=row["video__slug"],
+        subtopic_id=row["subtopic_id"], subtopic_slug=row["subtopic__slug"],
+        expires_at=row["expires_at"],
+    )
+
+class TokenCache:
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Optional[ResolvedLink]]]" = OrderedDict()
+
+    def get(self, token: str) -> Tuple[bool, Optional[ResolvedLink]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return False, None
+            if entry[0] <= now:
+                del self._entries[token]
+                return False, None
+            self._entries.move_to_end(token)
+            return True, entry[1]
+
+    def put(self, token: str, link: Optional[ResolvedLink]):
+        ttl = self.ttl if link is not None else self.negative_ttl
+        with self._lock:
+            self._entries[token] = (time.monotonic() + ttl, link)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def invalidate_clinic(self, clinic_id: int):
+        with self._lock:
+            stale = [t for t, (_, link) in self._entries.items() if link is not None and link.clinic.id == clinic_id]
+            for t in stale:
+                del self._entries[t]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL, TOKEN_NEGATIVE_TTL)
+
+def resolve_token(token: str) -> Optional[ResolvedLink]:
+    """
+    Return the ResolvedLink for `token` (possibly expired or archived; see
+    ResolvedLink.is_expired), or None if no such link exists.
+    """
+    if not token or len(token) > 32:
+        return None
+    if is_signed(token) and parse_token(token) is None:
+        return None  # forged / mangled: no cache entry, no query
+    hit, link = token_cache.get(token)
+    if hit:
+        return link
+    link = _load(token)
+    token_cache.put(token, link)
+    return link
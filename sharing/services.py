@@ -1,36 +1,19 @@
 # sharing/services.py
 from urllib.parse import quote_plus
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from django.db import transaction
 from django.shortcuts import get_object_or_404
 
-from accounts.models import Doctor
-from clinics.models import Clinic, DoctorClinic
+from clinics.models import Clinic
 from content.models import Video, Subtopic, VideoI18n, SubtopicI18n
 from core.models import Language
+from .directory import DoctorRef, doctor_for, language_codes
+from .links import share_url
 from .models import ShareLink, ShareEvent
+from .tokens import make_token, signed_tokens_enabled
 from messaging.models import OutboundMessage
-from messaging.services import render_message
-
-def _pick_doctor_for_clinic(clinic: Clinic, acting_user=None) -> Doctor:
-    """
-    Prefer the Doctor explicitly linked to the acting user (if your portal membership stores it),
-    otherwise use the clinic's primary doctor.
-    """
-    # If acting_user has ClinicMember.doctor set, use that (Sprint 4 stored optional link)
-    if hasattr(acting_user, "clinic_memberships"):
-        cm = acting_user.clinic_memberships.filter(clinic=clinic, is_active=True, doctor__isnull=False).first()
-        if cm and cm.doctor:
-            return cm.doctor
-
-    dc = DoctorClinic.objects.filter(clinic=clinic, is_primary=True).select_related("doctor").first()
-    if dc:
-        return dc.doctor
-    # fallback: any doctor linked
-    any_dc = DoctorClinic.objects.filter(clinic=clinic).select_related("doctor").first()
-    if any_dc:
-        return any_dc.doctor
-    raise ValueError("No doctor found for clinic")
+from messaging.services import dedupe_key, dry_run_note, get_template, render_message
+from messaging.outbox import dispatch_on_commit
 
 def _video_title_in_language(video: Video, language_code: str) -> str:
     vloc = VideoI18n.objects.filter(video=video, language_id=language_code).first()
@@ -44,45 +27,51 @@ def build_whatsapp_deeplink(msisdn_10: str, message: str) -> str:
     # Indian numbers: prefix +91
     return f"https://wa.me/91{msisdn_10}?text={quote_plus(message)}"
 
+def _check_language(language_code: str):
+    if language_code not in language_codes():
+        raise Language.DoesNotExist(f"Unknown language: {language_code}")
+
+def _share_context(share_type: str, doctor: DoctorRef, language_code: str,
+                   video: Optional[Video] = None, subtopic: Optional[Subtopic] = None) -> Tuple[str, Dict[str, str]]:
+    """(template_key, message context without the link) for a share."""
+    if share_type == "video":
+        return "share_video", {"doctor_name": f"Dr. {doctor.full_name}",
+                               "title": _video_title_in_language(video, language_code)}
+    if share_type == "subtopic":
+        return "share_subtopic", {"doctor_name": f"Dr. {doctor.full_name}",
+                                  "subtopic": _subtopic_name_in_language(subtopic, language_code)}
+    return "share_portal", {"doctor_name": f"Dr. {doctor.full_name}"}
+
 @transaction.atomic
 def create_share(
     *, clinic: Clinic, language_code: str, patient_msisdn: str,
     share_type: str, video: Optional[Video] = None, subtopic: Optional[Subtopic] = None,
-    acting_user=None
+    acting_user=None, base_url: str = ""
 ) -> Tuple[ShareLink, ShareEvent, OutboundMessage, str]:
     """
     Create ShareLink + ShareEvent + OutboundMessage and return wa.me deep-link.
+    `base_url` (scheme + host) makes the link in the message absolute; the message
+    is rendered once and sent after commit (messaging.signals).
     """
-    # Resolve doctor (display name in message)
-    doctor = _pick_doctor_for_clinic(clinic, acting_user=acting_user)
-    Language.objects.get(code=language_code)  # ensure exists
+    # Resolve doctor (display name in message); cached, see sharing.directory
+    doctor = doctor_for(clinic.pk, acting_user)
+    _check_language(language_code)
 
     # Build share link first (used in message)
     link = ShareLink.objects.create(
-        type=share_type, doctor=doctor, clinic=clinic, language_id=language_code,
+        type=share_type, doctor_id=doctor.id, clinic=clinic, language_id=language_code,
         video=video if share_type == "video" else None,
         subtopic=subtopic if share_type == "subtopic" else None
     )
-    link_url = f"/s/{link.token}/"  # local placeholder; becomes absolute in view
+    link_url = base_url + share_url(link.token)
 
     # Render message by template key
-    if share_type == "video":
-        template_key = "share_video"
-        title = _video_title_in_language(video, language_code)
-        ctx = {"doctor_name": f"Dr. {doctor.full_name}", "title": title, "link": link_url}
-    elif share_type == "subtopic":
-        template_key = "share_subtopic"
-        name = _subtopic_name_in_language(subtopic, language_code)
-        ctx = {"doctor_name": f"Dr. {doctor.full_name}", "subtopic": name, "link": link_url}
-    else:
-        template_key = "share_portal"
-        ctx = {"doctor_name": f"Dr. {doctor.full_name}", "link": link_url}
-
-    body = render_message(template_key, language_code, channel="whatsapp", context=ctx)
+    template_key, ctx = _share_context(share_type, doctor, language_code, video, subtopic)
+    body = render_message(template_key, language_code, channel="whatsapp", context={**ctx, "link": link_url})
 
     # Persist share event + outbound record
     event = ShareEvent.objects.create(
-        type=share_type, doctor=doctor, clinic=clinic, language_id=language_code,
+        type=share_type, doctor_id=doctor.id, clinic=clinic, language_id=language_code,
         video=video if share_type == "video" else None,
         subtopic=subtopic if share_type == "subtopic" else None,
         patient_msisdn=patient_msisdn,
@@ -98,3 +87,78 @@ def create_share(
     # Build WhatsApp deep-link
     deeplink = build_whatsapp_deeplink(patient_msisdn, body)
     return link, event, om, deeplink
+
+@transaction.atomic
+def create_bulk_share(
+    *, clinic: Clinic, language_code: str, msisdns: Sequence[str],
+    share_type: str, video: Optional[Video] = None, subtopic: Optional[Subtopic] = None,
+    acting_user=None, base_url: str = ""
+) -> List[Dict]:
+    """
+    Share one item with many patients: one ShareLink + ShareEvent + OutboundMessage
+    per number, all written with bulk_create in this transaction. Doctor, language
+    and compiled template are resolved once; the messages are dispatched from the
+    outbox after commit. `base_url` (scheme + host) makes the links in the message absolute.
+    Returns one result dict per input number, in input order.
+    """
+    doctor = doctor_for(clinic.pk, acting_user)
+    _check_language(language_code)
+    video = video if share_type == "video" else None
+    subtopic = subtopic if share_type == "subtopic" else None
+
+    results, seen = [], set()
+    for msisdn in msisdns:
+        results.append({"msisdn": msisdn, "status": "duplicate" if msisdn in seen else "queued"})
+        seen.add(msisdn)
+    queued = [r for r in results if r["status"] == "queued"]
+    if not queued:
+        return results
+
+    links = ShareLink.objects.bulk_create([
+        ShareLink(type=share_type, doctor_id=doctor.id, clinic=clinic, language_id=language_code,
+                  video=video, subtopic=subtopic)
+        for _ in queued
+    ])
+    if links[0].pk is None:  # MySQL returns no ids from bulk INSERT; tokens are unique
+        ids = dict(ShareLink.objects.filter(token__in=[l.token for l in links]).values_list("token", "id"))
+        for link in links:
+            link.pk = ids[link.token]
+    if signed_tokens_enabled():
+        for link in links:
+            link.token = make_token(link.pk, link.type)
+        ShareLink.objects.bulk_update(links, ["token"])
+
+    template_key, ctx = _share_context(share_type, doctor, language_code, video, subtopic)
+    bodies = get_template(template_key, language_code, channel="whatsapp").render_many(
+        {**ctx, "link": base_url + share_url(link.token)} for link in links)
+    events = ShareEvent.objects.bulk_create([
+        ShareEvent(type=share_type, doctor_id=doctor.id, clinic=clinic, language_id=language_code,
+                   video=video, subtopic=subtopic, patient_msisdn=r["msisdn"], share_link=link, channel="whatsapp",
+                   message_preview=body)
+        for r, link, body in zip(queued, links, bodies)
+    ])
+    if events[0].pk is None:
+        ids = dict(ShareEvent.objects.filter(share_link__in=links).values_list("share_link_id", "id"))
+        for event in events:
+            event.pk = ids[event.share_link_id]
+
+    note = dry_run_note("whatsapp")
+    messages = []
+    for event in events:
+        om = OutboundMessage(share_event=event, to_msisdn=event.patient_msisdn, channel="whatsapp",
+                             language_id=language_code, template_key=template_key, body_rendered=event.message_preview,
+                             status="sent" if note else "queued", status_meta={"note": note} if note else {})
+        om.dedupe_key = dedupe_key(om)  # bulk_create skips messaging.signals
+        messages.append(om)
+    messages = OutboundMessage.objects.bulk_create(messages)
+    if messages[0].pk is None:
+        ids = dict(OutboundMessage.objects.filter(share_event__in=events).values_list("share_event_id", "id"))
+        for om in messages:
+            om.pk = ids[om.share_event_id]
+    if not note:
+        dispatch_on_commit(om.pk for om in messages)
+
+    for r, link, om in zip(queued, links, messages):
+        r.update({"token": link.token, "outbound_id": om.pk, "status": om.status,
+                  "deeplink": build_whatsapp_deeplink(r["msisdn"], om.body_rendered)})
+    return results
@@ -0,0 +1,48 @@
+# sharing/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import Doctor
+from clinics.models import Clinic, DoctorClinic
+from content.signals import catalog_changed
+from core.models import Language
+from portal.models import ClinicMember
+from .directory import invalidate_doctors, invalidate_languages
+from .models import ShareLink
+from .prerender import schedule_prerender
+from .resolver import token_cache
+
+@receiver(post_save, sender=ShareLink)
+@receiver(post_delete, sender=ShareLink)
+def share_link_changed(sender, instance: ShareLink, **kwargs):
+    # Also clears a cached "unknown token" entry when the link is created.
+    token_cache.invalidate(instance.token)
+
+@receiver(post_save, sender=Clinic)
+@receiver(post_delete, sender=Clinic)
+def clinic_changed(sender, instance: Clinic, **kwargs):
+    token_cache.invalidate_clinic(instance.pk)
+    if kwargs.get("signal") is post_save:
+        transaction.on_commit(lambda: schedule_prerender(instance.pk))
+
+@receiver(catalog_changed)
+def prerender_on_catalog_change(sender, **kwargs):
+    schedule_prerender()
+
+@receiver(post_save, sender=ClinicMember)
+@receiver(post_delete, sender=ClinicMember)
+@receiver(post_save, sender=DoctorClinic)
+@receiver(post_delete, sender=DoctorClinic)
+def clinic_doctors_changed(sender, instance, **kwargs):
+    invalidate_doctors(instance.clinic_id)
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def doctor_changed(sender, instance: Doctor, **kwargs):
+    invalidate_doctors()  # full_name is cached per (user, clinic)
+
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+def language_changed(sender, instance: Language, **kwargs):
+    invalidate_languages()
@@ -0,0 +1,50 @@
+// sharing/static/sharing/patient.js: loaded (deferred) by templates/sharing/patient_base.html.
+// Page data comes from data- attributes on <body>: beacon, sw, home, visit-kind/-slug/-token.
+// Visit beacon: token comes from ?t= (old links), the landing page, or sessionStorage;
+// the server falls back to the landing cookie, so the HTML itself stays token-free.
+// Beacons that can't be sent (offline) wait in localStorage until the device is back online.
+(function () {
+  var d = document.body.dataset, t = "", Q = "pe:q";
+  try {
+    t = new URLSearchParams(location.search).get("t") || d.visitToken || sessionStorage.getItem("pe:t") || "";
+    if (t) sessionStorage.setItem("pe:t", t);
+  } catch (e) {}
+
+  function pending() {
+    try { return JSON.parse(localStorage.getItem(Q) || "[]"); } catch (e) { return []; }
+  }
+  function keep(list) {
+    try { localStorage.setItem(Q, JSON.stringify(list.slice(-50))); } catch (e) {}
+  }
+  function send(p) {
+    if (navigator.onLine === false) return false;
+    var q = new URLSearchParams(p);
+    if (!(navigator.sendBeacon && navigator.sendBeacon(d.beacon, q))) {
+      new Image().src = d.beacon + "?" + q.toString();
+    }
+    return true;
+  }
+  function replay() {
+    var list = pending();
+    if (list.length) keep(list.filter(function (p) { return !send(p); }));
+  }
+  window.addEventListener("online", replay);
+  replay();
+
+  if (d.visitKind) {
+    var p = {t: t, k: d.visitKind, s: d.visitSlug || ""};
+    if (!send(p)) keep(pending().concat([p]));
+  }
+
+  // Offline app shell for /p/ pages and /s/ entry links (see sharing/sw.js); the
+  // worker lives at /p/sw.js but takes the site root as scope.
+  if ("serviceWorker" in navigator && d.sw) {
+    var scope = new URL("../", new URL(d.sw, location.href)).pathname;
+    navigator.serviceWorker.register(d.sw, {scope: scope, updateViaCache: "none"}).then(function () {
+      return navigator.serviceWorker.ready;
+    }).then(function (reg) {
+      var urls = [location.pathname, d.home].filter(Boolean);
+      if (reg.active) reg.active.postMessage({type: "warm", urls: urls});
+    }).catch(function () {});
+  }
+})();
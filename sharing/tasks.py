@@ -0,0 +1,20 @@
+# sharing/tasks.py
+from celery import shared_task
+from django.core import management
+
+@shared_task
+def prerender_portals_task(clinic_id=None):
+    if clinic_id:
+        management.call_command("prerender_portals", clinic_id=clinic_id)
+    else:
+        management.call_command("prerender_portals")
+
+@shared_task
+def manage_link_visit_partitions_task():
+    # Schedule monthly (e.g. celery beat): adds upcoming partitions, applies retention.
+    management.call_command("manage_link_visit_partitions")
+
+@shared_task
+def archive_expired_links_task():
+    # Schedule daily (e.g. celery beat): moves links past expiry + grace to cold storage.
+    management.call_command("archive_expired_links")
@@ -0,0 +1,63 @@
+# sharing/tokens.py
+"""
+Signed share tokens: `<payload>.<mac>`, both urlsafe-base64 without padding.
+
+payload = one header byte (format version << 4 | link type nibble) followed by
+the ShareLink primary key as a minimal big-endian integer; mac = the first 8
+bytes of an HMAC-SHA256 over the payload (salted_hmac, keyed by
+SHARE_TOKEN_SECRET or SECRET_KEY). A pk up to 2**63 yields at most 24 chars.
+
+Random tokens from `_token()` never contain ".", so both formats coexist: the
+resolver verifies signed tokens and looks the link up by primary key; forged
+or mangled ones are rejected without a query. Which format new links get is
+controlled by SHARE_TOKEN_FORMAT ("random" | "signed").
+"""
+import base64
+import binascii
+import hmac
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+VERSION = 1
+MAC_BYTES = 8
+TYPE_CODES = {"video": 1, "subtopic": 2, "portal": 3}
+_TYPES_BY_CODE = {code: name for name, code in TYPE_CODES.items()}
+_SALT = "sharing.tokens.ShareLink"
+
+def signed_tokens_enabled() -> bool:
+    return getattr(settings, "SHARE_TOKEN_FORMAT", "random") == "signed"
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _mac(payload: bytes) -> bytes:
+    secret = getattr(settings, "SHARE_TOKEN_SECRET", None) or settings.SECRET_KEY
+    return salted_hmac(_SALT, payload, secret=secret, algorithm="sha256").digest()[:MAC_BYTES]
+
+def make_token(pk: int, link_type: str) -> str:
+    payload = bytes([VERSION << 4 | TYPE_CODES[link_type]]) + pk.to_bytes((pk.bit_length() + 7) // 8 or 1, "big")
+    return f"{_b64(payload)}.{_b64(_mac(payload))}"
+
+def is_signed(token: str) -> bool:
+    return "." in token
+
+def parse_token(token: str) -> Optional[Tuple[int, str]]:
+    """(pk, link type) for a valid signed token, None for anything else."""
+    head, sep, mac = token.partition(".")
+    if not sep or not head or not mac:
+        return None
+    try:
+        payload, mac = _unb64(head), _unb64(mac)
+    except (binascii.Error, ValueError):
+        return None
+    if len(payload) < 2 or not hmac.compare_digest(mac, _mac(payload)):
+        return None
+    link_type = _TYPES_BY_CODE.get(payload[0] & 0x0F)
+    if payload[0] >> 4 != VERSION or link_type is None:
+        return None
+    return int.from_bytes(payload[1:], "big"), link_type
@@ -1,6 +1,6 @@
 # sharing/urls.py
 from django.urls import path
-from .views import ShareLinkView, PatientHomeView, PatientSubtopicView, PatientVideoView
+from .views import ShareLinkView, PatientHomeView, PatientSubtopicView, PatientVideoView, visit_beacon, service_worker
 
 app_name = "sharing"
 
@@ -8,7 +8,13 @@ urlpatterns = [
     # Token resolver (entry point from WhatsApp message)
     path("s/<str:token>/", ShareLinkView.as_view(), name="resolve"),
 
-    # Patient browsing pages (keep ?t=<token> to continue tracking)
+    # Visit beacon fired by the browsing pages (token from ?t=, sessionStorage or the landing cookie)
+    path("p/beacon/", visit_beacon, name="beacon"),
+
+    # Service worker; served from /p/ with Service-Worker-Allowed: / so it can also cover /s/ links
+    path("p/sw.js", service_worker, name="sw"),
+
+    # Patient browsing pages (cacheable; tracking goes through the beacon)
     path("p/<slug:slug>/<slug:lang>/", PatientHomeView.as_view(), name="patient_home"),
     path("p/<slug:slug>/<slug:lang>/subtopic/<slug:sub_slug>/", PatientSubtopicView.as_view(), name="patient_subtopic"),
     path("p/<slug:slug>/<slug:lang>/video/<slug:vid_slug>/", PatientVideoView.as_view(), name="patient_video"),
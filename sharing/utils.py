@@ -1,7 +1,7 @@
 # sharing/utils.py
-from urllib.parse import urlparse, parse_qs
-from typing import Optional
+from typing import Dict, Iterable, Optional
 from content.models import Video, VideoI18n, Subtopic, SubtopicI18n
+from content.validators import parse_youtube_id
 
 # --- Tiny i18n for UI labels (can expand later) ---
 _UI = {
@@ -35,28 +35,24 @@ _UI = {
         "ta": "துணைத் தலைப்புகள்",
         "bn": "উপ-বিষয়",
     },
+    "link_expired": {
+        "en": "This link has expired.",
+        "hi": "यह लिंक समाप्त हो गया है।",
+        "te": "ఈ లింక్ గడువు ముగిసింది.",
+        "ml": "ഈ ലിങ്കിന്റെ കാലാവധി കഴിഞ്ഞു.",
+        "mr": "ही लिंक कालबाह्य झाली आहे.",
+        "kn": "ಈ ಲಿಂಕ್‌ನ ಅವಧಿ ಮುಗಿದಿದೆ.",
+        "ta": "இந்த இணைப்பு காலாவதியாகிவிட்டது.",
+        "bn": "এই লিঙ্কের মেয়াদ শেষ হয়ে গেছে।",
+    },
 }
 
 def ui_label(key: str, lang: str) -> str:
     return _UI.get(key, {}).get(lang, _UI.get(key, {}).get("en", key))
 
-# --- YouTube id extraction (from validator logic) ---
+# --- YouTube id extraction (stored on VideoI18n.youtube_id at save time) ---
 def youtube_id(url: str) -> Optional[str]:
-    try:
-        p = urlparse(url)
-    except Exception:
-        return None
-    host = (p.netloc or "").lower()
-    if "youtu.be" in host:
-        vid = p.path.strip("/").split("/")[0]
-        return vid or None
-    if "youtube.com" in host:
-        if p.path == "/watch":
-            return parse_qs(p.query).get("v", [None])[0]
-        parts = [seg for seg in p.path.strip("/").split("/") if seg]
-        if len(parts) >= 2 and parts[0] in {"embed", "shorts"}:
-            return parts[1]
-    return None
+    return parse_youtube_id(url)
 
 # --- Localization helpers & fallbacks ---
 def title_for_video(video: Video, lang: str) -> str:
@@ -82,3 +78,69 @@ def thumb_for_subtopic(subtopic: Subtopic, lang: str) -> Optional[str]:
     if sloc and sloc.thumbnail_url:
         return sloc.thumbnail_url
     return subtopic.default_thumbnail_url or None
+
+# --- Batched localization (one query per listing instead of several per row) ---
+def localize_videos(videos: Iterable[Video], lang: str) -> Dict[int, Dict[str, Optional[str]]]:
+    """
+    Resolve title, thumbnail and YouTube URL for many videos with a single
+    VideoI18n query. Fallbacks match the per-row helpers above:
+    localized row → English row → Video.title_en / subtopic default thumbnail.
+    Pass videos with `subtopic` select_related to keep the thumbnail fallback free.
+    Returns {video_id: {"title", "thumb", "youtube_url", "youtube_id"}}.
+    """
+    videos = list(videos)
+    if not videos:
+        return {}
+
+    rows = (VideoI18n.objects
+            .filter(video_id__in=[v.id for v in videos], language_id__in={lang, "en"})
+            .order_by("id")
+            .values_list("video_id", "language_id", "title_local", "thumbnail_url", "youtube_url", "youtube_id"))
+    local, english = {}, {}
+    for video_id, code, title, thumb, url, yt_id in rows:
+        if code == lang:
+            local.setdefault(video_id, (title, thumb, url, yt_id))
+        if code == "en":
+            english.setdefault(video_id, (title, thumb, url, yt_id))
+
+    out = {}
+    for v in videos:
+        loc = local.get(v.id)
+        en = english.get(v.id)
+        thumb = (loc and loc[1]) or (en and en[1]) or v.subtopic.default_thumbnail_url or None
+        picked = loc or en
+        out[v.id] = {
+            "title": loc[0] if loc else v.title_en,
+            "thumb": thumb,
+            "youtube_url": picked[2] if picked else None,
+            # rows saved before youtube_id existed are parsed until backfill_youtube_ids runs
+            "youtube_id": (picked[3] or parse_youtube_id(picked[2])) if picked else None,
+        }
+    return out
+
+def localize_subtopics(subtopics: Iterable[Subtopic], lang: str) -> Dict[int, Dict[str, Optional[str]]]:
+    """
+    Resolve name and thumbnail for many subtopics with a single SubtopicI18n query.
+    Fallbacks: localized row → slug / default_thumbnail_url.
+    Returns {subtopic_id: {"name", "thumb"}}.
+    """
+    subtopics = list(subtopics)
+    if not subtopics:
+        return {}
+
+    rows = (SubtopicI18n.objects
+            .filter(subtopic_id__in=[s.id for s in subtopics], language_id=lang)
+            .order_by("id")
+            .values_list("subtopic_id", "name_local", "thumbnail_url"))
+    local = {}
+    for subtopic_id, name, thumb in rows:
+        local.setdefault(subtopic_id, (name, thumb))
+
+    out = {}
+    for s in subtopics:
+        loc = local.get(s.id)
+        out[s.id] = {
+            "name": loc[0] if loc else s.slug,
+            "thumb": (loc and loc[1]) or s.default_thumbnail_url or None,
+        }
+    return out
@@ -1,262 +1,235 @@
 # sharing/views.py
+import base64
+import hashlib
+import re
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from django.conf import settings
 from django.views.generic import TemplateView
+from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404, redirect
-from django.http import HttpResponse, HttpResponseForbidden
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.urls import get_script_prefix, reverse
+from django.http import Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotAllowed
 from django.utils import timezone
+from django.utils.cache import add_never_cache_headers, get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.db.models import Prefetch
-from django.urls import reverse
-from typing import Optional
+from typing import Optional, Tuple
 
-from .models import ShareLink, LinkVisit
 from clinics.models import Clinic
-from content.models import Subtopic, SubtopicI18n, Video, VideoI18n
-from .utils import (
-    youtube_id, title_for_video, name_for_subtopic,
-    thumb_for_video, thumb_for_subtopic, ui_label
+from content.services import content_version
+from .catalog import get_catalog
+from .crawlers import is_preview_agent, preview_response
+from .pages import (
+    PAGE_TEMPLATES, templates_revision, page_context, expired_context, home_context, subtopic_context,
+    video_context,
 )
+from .prerender import PRERENDER_ENABLED, load_page
+from .resolver import ResolvedLink, resolve_token
+from .visits import record_preview, record_visit
 
-# --- helper: log a LinkVisit if token is provided & valid ---
-def _log_visit(request, token: Optional[str], extra_referer: Optional[str] = None, link: Optional[ShareLink] = None):
+# Token of the last /s/<token>/ landing; lets tokenless /p/ pages still attribute beacons.
+VISIT_COOKIE = "pt"
+VISIT_COOKIE_MAX_AGE = 60 * 60 * 24 * 30
+# Patient pages carry no per-patient data, so browsers and shared caches may keep them.
+PATIENT_PAGE_MAX_AGE = getattr(settings, "PATIENT_PAGE_MAX_AGE", 300)
+
+_BEACON_KINDS = {"home", "subtopic", "video"}
+_SLUG_RE = re.compile(r"^[-a-zA-Z0-9_]{1,128}$")
+_PIXEL = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+def _page_validators(clinic, lang: str, *identity) -> Tuple[str, int]:
+    """
+    (ETag, Last-Modified timestamp) for a patient page: the content version, the
+    clinic's updated_at (branding), the language and the page identity.
+    """
+    version = content_version()
+    parts = (templates_revision(), version, clinic.id, clinic.updated_at.isoformat(), lang) + identity
+    etag = quote_etag(hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:24])
+    catalog_changed = datetime.fromtimestamp(version / 1000, tz=dt_timezone.utc)
+    return etag, int(max(clinic.updated_at, catalog_changed).timestamp())
+
+class ConditionalPageMixin:
+    """
+    Answers If-None-Match / If-Modified-Since with 304 before any context is built
+    or template rendered. Subclasses return (clinic, lang, identity...) from
+    `get_validator_parts`; anything else the page depends on is already in the catalog.
+    """
+    def get_validator_parts(self) -> tuple:
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = _page_validators(*self.get_validator_parts())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
+def _expired_response(request, link: ResolvedLink) -> HttpResponse:
+    """410 with the clinic-branded expired page; no visit is recorded."""
+    html = render_to_string("sharing/expired.html", expired_context(link.clinic, link.language), request=request)
+    response = HttpResponse(html, status=410)
+    patch_cache_control(response, public=True, max_age=PATIENT_PAGE_MAX_AGE)
+    return response
+
+# --- helper: queue a LinkVisit if token/link is provided (token resolved at flush time) ---
+def _log_visit(request, token: Optional[str], extra_referer: Optional[str] = None, link: Optional[ResolvedLink] = None):
     if not token and not link:
         return
-    if not link:
-        try:
-            link = ShareLink.objects.get(token=token)
-        except ShareLink.DoesNotExist:
-            return
-    LinkVisit.objects.create(
-        share_link=link,
-        ip=request.META.get("REMOTE_ADDR"),
-        user_agent=request.META.get("HTTP_USER_AGENT", ""),
-        referer=extra_referer or request.META.get("HTTP_REFERER", ""),
-    )
+    record_visit(request, share_link_id=link.id if link else None, token=token, referer=extra_referer)
 
-class ShareLinkView(TemplateView):
+class ShareLinkView(ConditionalPageMixin, TemplateView):
     """
     Token entry point: renders appropriate patient page (video | subtopic | portal).
     """
     template_name = "sharing/patient_home.html"  # replaced at runtime
 
     def dispatch(self, request, *args, **kwargs):
-        self.link: ShareLink = get_object_or_404(ShareLink, token=kwargs.get("token"))
-        # First impression tracking
+        self.link: ResolvedLink = resolve_token(kwargs.get("token"))
+        if self.link is None:
+            raise Http404("Link not found")
+        if self.link.is_expired():
+            return _expired_response(request, self.link)
+        if is_preview_agent(request.META.get("HTTP_USER_AGENT", "")):
+            # WhatsApp/Facebook/... unfurling the message: OpenGraph tags only, not a click
+            record_preview(self.link.id)
+            return preview_response(request, self.link)
+        # First impression tracking, also for 304s (browsing pages report theirs through the beacon)
         _log_visit(request, token=None, link=self.link, extra_referer="token:landing")
-        return super().dispatch(request, *args, **kwargs)
+        response = super().dispatch(request, *args, **kwargs)
+        response.set_cookie(VISIT_COOKIE, self.link.token, max_age=VISIT_COOKIE_MAX_AGE,
+                            samesite="Lax", httponly=True)
+        # Per-token body and cookie: browser only, revalidated (cheap 304) on every click.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_validator_parts(self):
+        return self.link.clinic, self.link.language, "link", self.link.token
 
     def get_template_names(self):
-        if self.link.type == "video":
-            return ["sharing/patient_video.html"]
-        if self.link.type == "subtopic":
-            return ["sharing/patient_subtopic.html"]
-        return ["sharing/patient_home.html"]
+        if self.link.type in ("video", "subtopic"):
+            return [PAGE_TEMPLATES[self.link.type]]
+        return [PAGE_TEMPLATES["home"]]
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        lang = self.link.language_id
         clinic = self.link.clinic
+        catalog = get_catalog(self.link.language)
 
         if self.link.type == "video":
-            video = self.link.video
-            vloc = VideoI18n.objects.filter(video=video, language_id=lang).first() or \
-                   VideoI18n.objects.filter(video=video, language_id="en").first()
-            vid_url = vloc.youtube_url if vloc else None
-            vid_id = youtube_id(vid_url) if vid_url else None
-
-            ctx.update({
-                "page_type": "video",
-                "clinic": clinic,
-                "lang": lang,
-                "labels": {
-                    "for_more_videos": ui_label("for_more_videos", lang),
-                    "back_to_home": ui_label("back_to_home", lang),
-                },
-                "video": video,
-                "video_title": title_for_video(video, lang),
-                "video_thumb": thumb_for_video(video, lang),
-                "youtube_id": vid_id,
-                "subtopic": video.subtopic,
-                "subtopic_name": name_for_subtopic(video.subtopic, lang),
-                # "For more videos" → subtopic page; include ?t=<token> so we can keep tracking
-                "more_url": reverse("sharing:patient_subtopic",
-                                    kwargs={"slug": clinic.portal_slug, "lang": lang, "sub_slug": video.subtopic.slug})
-                           + f"?t={self.link.token}",
-                "home_url": reverse("sharing:patient_home",
-                                    kwargs={"slug": clinic.portal_slug, "lang": lang}) + f"?t={self.link.token}",
-            })
-            return ctx
-
-        if self.link.type == "subtopic":
-            st = self.link.subtopic
-            videos = (Video.objects
-                      .filter(subtopic=st, is_active=True)
-                      .order_by("sort_order", "title_en")
-                      .select_related("subtopic", "subtopic__therapy_area"))
-            listing = []
-            for v in videos:
-                listing.append({
-                    "title": title_for_video(v, lang),
-                    "thumb": thumb_for_video(v, lang),
-                    "url": reverse("sharing:patient_video",
-                                   kwargs={"slug": clinic.portal_slug, "lang": lang, "vid_slug": v.slug})
-                           + f"?t={self.link.token}",
-                })
-            ctx.update({
-                "page_type": "subtopic",
-                "clinic": clinic,
-                "lang": lang,
-                "labels": {
-                    "for_more_videos": ui_label("for_more_videos", lang),
-                    "subtopics": ui_label("subtopics", lang),
-                    "back_to_home": ui_label("back_to_home", lang),
-                },
-                "subtopic": st,
-                "subtopic_name": name_for_subtopic(st, lang),
-                "subtopic_thumb": thumb_for_subtopic(st, lang),
-                "videos": listing,
-                "home_url": reverse("sharing:patient_home",
-                                    kwargs={"slug": clinic.portal_slug, "lang": lang}) + f"?t={self.link.token}",
-            })
-            return ctx
-
-        # portal (home)
-        subs = (Subtopic.objects
-                .filter(is_active=True)
-                .order_by("sort_order", "slug")
-                .select_related("therapy_area"))
-        listing = []
-        for s in subs:
-            listing.append({
-                "name": name_for_subtopic(s, lang),
-                "thumb": thumb_for_subtopic(s, lang),
-                "url": reverse("sharing:patient_subtopic",
-                               kwargs={"slug": clinic.portal_slug, "lang": lang, "sub_slug": s.slug})
-                       + f"?t={self.link.token}",
-            })
-        ctx.update({
-            "page_type": "home",
-            "clinic": clinic,
-            "lang": lang,
-            "labels": {"subtopics": ui_label("subtopics", lang)},
-            "subtopics": listing,
-        })
+            video = catalog.video_by_id(self.link.video_id)
+            if video is None:
+                raise Http404("Video not found")
+            ctx.update(video_context(clinic, catalog, video))
+        elif self.link.type == "subtopic":
+            subtopic = catalog.subtopic_by_id(self.link.subtopic_id)
+            if subtopic is None:
+                raise Http404("Subtopic not found")
+            ctx.update(subtopic_context(clinic, catalog, subtopic))
+        else:
+            ctx.update(home_context(clinic, catalog))
+
+        # The landing visit is logged above; the page only seeds the token for later beacons.
+        ctx.update({"visit_kind": "", "visit_token": self.link.token})
         return ctx
 
-# ---- Non-token browsing pages (keep token in ?t= for continued tracking) ----
-
-class PatientHomeView(TemplateView):
-    template_name = "sharing/patient_home.html"
-
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        slug = kwargs["slug"]
-        lang = kwargs["lang"]
-        clinic = get_object_or_404(Clinic, portal_slug=slug)
-        token = self.request.GET.get("t")
-        if token:
-            _log_visit(self.request, token, extra_referer="internal:home")
+# ---- Browsing pages: identical HTML for every patient of a clinic + language ----
+# Visits are reported by the page itself through `visit_beacon` (see patient_base.html),
+# so nothing here depends on ?t= and the responses can sit in browser/CDN caches.
 
-        subs = (Subtopic.objects
-                .filter(is_active=True)
-                .order_by("sort_order", "slug")
-                .select_related("therapy_area"))
-        listing = []
-        for s in subs:
-            url = reverse("sharing:patient_subtopic",
-                          kwargs={"slug": slug, "lang": lang, "sub_slug": s.slug})
-            if token:
-                url += f"?t={token}"
-            listing.append({"name": name_for_subtopic(s, lang), "thumb": thumb_for_subtopic(s, lang), "url": url})
-
-        ctx.update({
-            "page_type": "home",
-            "clinic": clinic,
-            "lang": lang,
-            "labels": {"subtopics": ui_label("subtopics", lang)},
-            "subtopics": listing,
-        })
-        return ctx
+class PublicPageMixin:
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            patch_cache_control(response, public=True, max_age=PATIENT_PAGE_MAX_AGE)
+        return response
+
+class PrerenderedPageMixin:
+    """Serve the pre-rendered file from storage while it is fresh (see sharing.prerender)."""
+    def get(self, request, *args, **kwargs):
+        if PRERENDER_ENABLED:
+            html = load_page(self.clinic, get_catalog(self.kwargs["lang"]), self.page_kind, self.page_slug)
+            if html is not None:
+                return HttpResponse(html)
+        return super().get(request, *args, **kwargs)
+
+class PatientPageMixin(PublicPageMixin, ConditionalPageMixin, PrerenderedPageMixin):
+    page_kind = ""
+
+    @property
+    def page_slug(self) -> str:
+        return self.kwargs.get("sub_slug") or self.kwargs.get("vid_slug") or ""
+
+    def get_validator_parts(self):
+        self.clinic = get_object_or_404(Clinic, portal_slug=self.kwargs["slug"])
+        return self.clinic, self.kwargs["lang"], self.page_kind, self.page_slug
 
-class PatientSubtopicView(TemplateView):
-    template_name = "sharing/patient_subtopic.html"
+    def get_template_names(self):
+        return [PAGE_TEMPLATES[self.page_kind]]
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        slug = kwargs["slug"]; lang = kwargs["lang"]; sub_slug = kwargs["sub_slug"]
-        clinic = get_object_or_404(Clinic, portal_slug=slug)
-        subtopic = get_object_or_404(Subtopic, slug=sub_slug)
-        token = self.request.GET.get("t")
-        if token:
-            _log_visit(self.request, token, extra_referer=f"internal:subtopic:{sub_slug}")
-
-        videos = (Video.objects.filter(subtopic=subtopic, is_active=True)
-                  .order_by("sort_order", "title_en"))
-        listing = []
-        for v in videos:
-            url = reverse("sharing:patient_video",
-                          kwargs={"slug": slug, "lang": lang, "vid_slug": v.slug})
-            if token:
-                url += f"?t={token}"
-            listing.append({"title": title_for_video(v, lang), "thumb": thumb_for_video(v, lang), "url": url})
-
-        home_url = reverse("sharing:patient_home", kwargs={"slug": slug, "lang": lang})
-        if token: home_url += f"?t={token}"
-
-        ctx.update({
-            "page_type": "subtopic",
-            "clinic": clinic,
-            "lang": lang,
-            "labels": {
-                "for_more_videos": ui_label("for_more_videos", lang),
-                "subtopics": ui_label("subtopics", lang),
-                "back_to_home": ui_label("back_to_home", lang),
-            },
-            "subtopic": subtopic,
-            "subtopic_name": name_for_subtopic(subtopic, lang),
-            "subtopic_thumb": thumb_for_subtopic(subtopic, lang),
-            "videos": listing,
-            "home_url": home_url,
-        })
+        ctx.update(page_context(self.clinic, get_catalog(kwargs["lang"]), self.page_kind, self.page_slug))
         return ctx
 
-class PatientVideoView(TemplateView):
-    template_name = "sharing/patient_video.html"
+class PatientHomeView(PatientPageMixin, TemplateView):
+    page_kind = "home"
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        slug = kwargs["slug"]; lang = kwargs["lang"]; vid_slug = kwargs["vid_slug"]
-        clinic = get_object_or_404(Clinic, portal_slug=slug)
-        video = get_object_or_404(Video, slug=vid_slug)
-        token = self.request.GET.get("t")
-        if token:
-            _log_visit(self.request, token, extra_referer=f"internal:video:{vid_slug}")
-
-        vloc = VideoI18n.objects.filter(video=video, language_id=lang).first() or \
-               VideoI18n.objects.filter(video=video, language_id="en").first()
-        vid_url = vloc.youtube_url if vloc else None
-        vid_id = youtube_id(vid_url) if vid_url else None
+class PatientSubtopicView(PatientPageMixin, TemplateView):
+    page_kind = "subtopic"
 
-        more_url = reverse("sharing:patient_subtopic",
-                           kwargs={"slug": slug, "lang": lang, "sub_slug": video.subtopic.slug})
-        home_url = reverse("sharing:patient_home", kwargs={"slug": slug, "lang": lang})
-        if token:
-            more_url += f"?t={token}"
-            home_url += f"?t={token}"
+class PatientVideoView(PatientPageMixin, TemplateView):
+    page_kind = "video"
 
-        ctx.update({
-            "page_type": "video",
-            "clinic": clinic,
-            "lang": lang,
-            "labels": {
-                "for_more_videos": ui_label("for_more_videos", lang),
-                "back_to_home": ui_label("back_to_home", lang),
-            },
-            "video": video,
-            "video_title": title_for_video(video, lang),
-            "video_thumb": thumb_for_video(video, lang),
-            "youtube_id": vid_id,
-            "subtopic": video.subtopic,
-            "subtopic_name": name_for_subtopic(video.subtopic, lang),
-            "more_url": more_url,
-            "home_url": home_url,
-        })
-        return ctx
+@csrf_exempt
+def visit_beacon(request):
+    """
+    Visit beacon for the browsing pages: navigator.sendBeacon (POST) or a 1x1 pixel (GET).
+    Params: t=<token> (falls back to the landing cookie), k=home|subtopic|video, s=<slug>.
+    Records the same referer codes the pages used to write inline (internal:<kind>[:<slug>]).
+    """
+    if request.method not in ("GET", "POST"):
+        return HttpResponseNotAllowed(["GET", "POST"])
+    params = request.POST if request.method == "POST" else request.GET
+
+    kind = params.get("k", "")
+    slug = params.get("s", "")
+    token = (params.get("t") or request.COOKIES.get(VISIT_COOKIE) or "")[:32]
+    if kind in _BEACON_KINDS and token and not is_preview_agent(request.META.get("HTTP_USER_AGENT", "")):
+        if kind == "home":
+            _log_visit(request, token, extra_referer="internal:home")
+        elif _SLUG_RE.match(slug):
+            _log_visit(request, token, extra_referer=f"internal:{kind}:{slug}")
+
+    if request.method == "POST":
+        response = HttpResponse(status=204)
+    else:
+        response = HttpResponse(_PIXEL, content_type="image/gif")
+    add_never_cache_headers(response)
+    return response
+
+@lru_cache(maxsize=8)
+def _service_worker_js(version: str) -> str:
+    return render_to_string("sharing/sw.js", {
+        "version": version,
+        "beacon_url": reverse("sharing:beacon"),
+        "static_url": static(""),
+        "link_prefix": reverse("sharing:resolve", args=["-"])[:-2],
+    })
+
+def service_worker(request):
+    """
+    /p/sw.js: offline cache for the patient pages and the /s/<token>/ entry links.
+    Its bytes change with the catalog version and the templates, which makes
+    browsers install a fresh worker that drops the old caches. Registered with the
+    site root as scope, which a script under /p/ needs Service-Worker-Allowed for.
+    """
+    version = f"{content_version()}-{templates_revision()}"
+    response = HttpResponse(_service_worker_js(version), content_type="application/javascript; charset=utf-8")
+    response["Service-Worker-Allowed"] = get_script_prefix()
+    patch_cache_control(response, no_cache=True, max_age=0)
+    return response
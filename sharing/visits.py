@@ -0,0 +1,352 @@
+# sharing/visits.py
+"""
+Write-behind visit ingestion, rolled up into LinkSession rows.
+
+Patient page views used to INSERT one LinkVisit each before responding. The
+recorder below queues visits in process memory and a daemon thread writes them
+either every VISIT_FLUSH_INTERVAL seconds or as soon as VISIT_FLUSH_BATCH visits
+are waiting. Tokens are resolved to ShareLink ids at flush time with one query
+per batch, so the request path does no DB work.
+
+A flush folds page views into sessions: one LinkSession per (link, client
+fingerprint) until VISIT_SESSION_WINDOW passes without activity, with a counter
+per page kind. Raw LinkVisit rows are kept only for a LINK_VISIT_SAMPLE_RATE
+fraction of views (0 by default). The same flush maintains the ShareLink
+first_visit_at / last_visit_at / visit_count counters, and preview_count for
+link-preview crawler hits (sharing.crawlers), which never become page views.
+
+The buffer is bounded (VISIT_BUFFER_SIZE); visits arriving while it is full are
+dropped and counted. A flush that fails (e.g. the DB is briefly away) puts its
+batch back at the front of the buffer for the next attempt, within the same
+bound. Whatever is still queued is flushed when the worker exits.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import random
+import threading
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .catalog import get_catalog
+from .models import ShareLink, LinkVisit, LinkSession, UserAgent, pack_ip
+
+logger = logging.getLogger(__name__)
+
+SESSION_WINDOW = timedelta(seconds=getattr(settings, "VISIT_SESSION_WINDOW", 30 * 60))
+SAMPLE_RATE = getattr(settings, "LINK_VISIT_SAMPLE_RATE", 0.0)
+
+_VIEW_FIELDS = {
+    "landing": "landing_views",
+    "home": "home_views",
+    "subtopic": "subtopic_views",
+    "video": "video_views",
+}
+
+# (share_link_id, ip, user_agent, referer, seen_at)
+PageView = Tuple[int, Optional[str], str, str, datetime]
+
+def page_kind(referer: Optional[str]) -> str:
+    """landing | home | subtopic | video, from the referer tags the views attach."""
+    if referer and referer.startswith("internal:"):
+        kind = referer.split(":", 2)[1]
+        if kind in _VIEW_FIELDS:
+            return kind
+    return "landing"
+
+_PAGE_CODES = {
+    "home": LinkVisit.PAGE_HOME,
+    "subtopic": LinkVisit.PAGE_SUBTOPIC,
+    "video": LinkVisit.PAGE_VIDEO,
+}
+
+def parse_referer(referer: Optional[str]) -> Tuple[int, Optional[int]]:
+    """(LinkVisit.PAGE_*, Subtopic/Video id) for a referer tag; real referers map to PAGE_OTHER."""
+    if referer == "token:landing":
+        return LinkVisit.PAGE_LANDING, None
+    if not referer or not referer.startswith("internal:"):
+        return LinkVisit.PAGE_OTHER, None
+    parts = referer.split(":", 2)
+    code = _PAGE_CODES.get(parts[1], LinkVisit.PAGE_OTHER)
+    if len(parts) < 3 or code not in (LinkVisit.PAGE_SUBTOPIC, LinkVisit.PAGE_VIDEO):
+        return code, None
+    catalog = get_catalog("en")  # slugs and ids are language independent
+    entry = catalog.subtopic(parts[2]) if code == LinkVisit.PAGE_SUBTOPIC else catalog.video(parts[2])
+    return code, entry.id if entry else None
+
+def intern_user_agents(values: Iterable[str]) -> Dict[str, int]:
+    """{user agent: UserAgent id}, creating the missing rows."""
+    by_hash = {UserAgent.hash_for(v): v for v in values if v}
+    if not by_hash:
+        return {}
+    known = dict(UserAgent.objects.filter(ua_hash__in=list(by_hash)).values_list("ua_hash", "id"))
+    missing = [UserAgent(ua_hash=h, value=v) for h, v in by_hash.items() if h not in known]
+    if missing:
+        UserAgent.objects.bulk_create(missing, ignore_conflicts=True)
+        known.update(UserAgent.objects.filter(ua_hash__in=[u.ua_hash for u in missing]).values_list("ua_hash", "id"))
+    return {v: known[h] for h, v in by_hash.items() if h in known}
+
+def _raw_visits(views: List[PageView]) -> List[LinkVisit]:
+    sampled = [v for v in views if random.random() < SAMPLE_RATE]
+    ua_ids = intern_user_agents({ua for _, _, ua, _, _ in sampled})
+    rows = []
+    for link_id, ip, ua, ref, _ in sampled:
+        kind, page_ref = parse_referer(ref)
+        rows.append(LinkVisit(share_link_id=link_id, ip=pack_ip(ip), user_agent_id=ua_ids.get(ua),
+                              page_kind=kind, page_ref=page_ref))
+    return rows
+
+def client_fingerprint(ip: Optional[str], user_agent: Optional[str]) -> str:
+    return hashlib.sha1(f"{ip or ''}|{user_agent or ''}".encode("utf-8")).hexdigest()
+
+def sessionize(views: Iterable[Tuple[int, str, str, datetime]], open_sessions: Dict[Tuple[int, str], LinkSession]):
+    """
+    Fold (link_id, fingerprint, kind, seen_at) views, oldest first, into sessions.
+    `open_sessions` maps (link_id, fingerprint) to the latest stored session and is
+    updated in place. Returns (new sessions, {existing session: {field: views to add}}).
+    """
+    created: List[LinkSession] = []
+    touched: Dict[LinkSession, Dict[str, int]] = {}
+    for link_id, fp, kind, seen_at in views:
+        field = _VIEW_FIELDS[kind]
+        current = open_sessions.get((link_id, fp))
+        if current is None or seen_at - current.last_seen_at > SESSION_WINDOW:
+            current = LinkSession(share_link_id=link_id, fingerprint=fp, started_at=seen_at, last_seen_at=seen_at)
+            open_sessions[(link_id, fp)] = current
+            created.append(current)
+        setattr(current, field, getattr(current, field) + 1)
+        current.last_seen_at = max(current.last_seen_at, seen_at)
+        if current.pk is not None:
+            touched.setdefault(current, defaultdict(int))[field] += 1
+    return created, touched
+
+def write_page_views(views: List[PageView]) -> int:
+    """Roll resolved page views into LinkSession (and sampled LinkVisit) rows."""
+    if not views:
+        return 0
+    keyed = sorted(
+        ((link_id, client_fingerprint(ip, ua), page_kind(ref), seen_at) for link_id, ip, ua, ref, seen_at in views),
+        key=lambda v: v[3],
+    )
+    open_sessions = {}
+    recent = (LinkSession.objects
+              .filter(share_link_id__in={v[0] for v in keyed},
+                      fingerprint__in={v[1] for v in keyed},
+                      last_seen_at__gte=keyed[0][3] - SESSION_WINDOW)
+              .order_by("last_seen_at"))
+    for session in recent:
+        open_sessions[(session.share_link_id, session.fingerprint)] = session
+
+    created, touched = sessionize(keyed, open_sessions)
+    raw = _raw_visits(views) if SAMPLE_RATE > 0 else []
+
+    per_link: Dict[int, List] = {}
+    for link_id, _, _, seen_at in keyed:
+        agg = per_link.setdefault(link_id, [0, seen_at, seen_at])
+        agg[0] += 1
+        agg[2] = seen_at
+
+    with transaction.atomic():
+        # Increment instead of bulk_update so concurrent workers never lose counts.
+        for link_id, (count, first, last) in per_link.items():
+            ShareLink.objects.filter(pk=link_id).update(
+                visit_count=F("visit_count") + count,
+                first_visit_at=Least(Coalesce(F("first_visit_at"), first), first),
+                last_visit_at=Greatest(Coalesce(F("last_visit_at"), last), last),
+            )
+        for session, counts in touched.items():
+            LinkSession.objects.filter(pk=session.pk).update(
+                last_seen_at=Greatest(F("last_seen_at"), session.last_seen_at),
+                **{field: F(field) + n for field, n in counts.items()},
+            )
+        LinkSession.objects.bulk_create(created)
+        if raw:
+            LinkVisit.objects.bulk_create(raw)
+    return len(views)
+
+def write_previews(previews: Dict[int, int]):
+    with transaction.atomic():  # all or nothing, so a failed write can be retried as a whole
+        for link_id, n in previews.items():
+            ShareLink.objects.filter(pk=link_id).update(preview_count=F("preview_count") + n)
+
+class VisitRecorder:
+    def __init__(self, max_buffer: int = 10000, batch_size: int = 500, flush_interval: float = 2.0):
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # failed: views in a flush that raised; they are requeued (or counted as dropped if there is no room)
+        self.counters = {"recorded": 0, "flushed": 0, "dropped": 0, "unresolved": 0, "failed": 0, "previews": 0}
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._buffer: deque = deque()
+        self._previews: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- producer side (request path) ----
+    def record(self, *, share_link_id: Optional[int] = None, token: Optional[str] = None,
+               ip: Optional[str] = None, user_agent: str = "", referer: str = ""):
+        if not share_link_id and not token:
+            return
+        if self._pid != os.getpid():
+            self._reset()  # forked worker: never inherit the parent's thread or buffer
+        self._ensure_thread()
+
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.counters["dropped"] += 1
+                return
+            self._buffer.append((share_link_id, token, ip, user_agent, referer, timezone.now()))
+            self.counters["recorded"] += 1
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def record_preview(self, share_link_id: int):
+        if self._pid != os.getpid():
+            self._reset()
+        self._ensure_thread()
+        with self._lock:
+            self._previews[share_link_id] += 1
+            self.counters["previews"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, buffered=len(self._buffer))
+
+    # ---- consumer side ----
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="link-visit-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("LinkVisit flush failed")
+            finally:
+                close_old_connections()
+
+    def _drain(self) -> Tuple[List[tuple], Counter]:
+        with self._lock:
+            items = list(self._buffer)
+            self._buffer.clear()
+            previews, self._previews = self._previews, Counter()
+        return items, previews
+
+    def _requeue(self, items: List[tuple], previews: Optional[Counter] = None):
+        """Put a batch whose write failed back in front of the buffer, oldest first, up to max_buffer."""
+        with self._lock:
+            if previews:
+                self._previews.update(previews)
+            room = max(self.max_buffer - len(self._buffer), 0)
+            kept = items[:room]
+            self._buffer.extendleft(reversed(kept))
+            self.counters["failed"] += len(items)
+            self.counters["dropped"] += len(items) - len(kept)
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of page views stored."""
+        with self._flush_lock:
+            items, previews = self._drain()
+            if previews:
+                try:
+                    write_previews(previews)
+                except Exception:
+                    self._requeue(items, previews)
+                    raise
+            if not items:
+                return 0
+
+            tokens = {tok for link_id, tok, *_ in items if not link_id and tok}
+            try:
+                ids_by_token = (dict(ShareLink.objects.filter(token__in=tokens).values_list("token", "id"))
+                                if tokens else {})
+            except Exception:
+                self._requeue(items)
+                raise
+
+            rows: List[PageView] = []
+            unresolved = 0
+            for link_id, tok, ip, ua, ref, seen_at in items:
+                link_id = link_id or ids_by_token.get(tok)
+                if not link_id:
+                    unresolved += 1
+                    continue
+                rows.append((link_id, ip, ua, ref, seen_at))
+
+            try:
+                write_page_views(rows)
+            except Exception:
+                # Requeue with the ids already resolved; unresolved tokens are not retried.
+                self._requeue([(link_id, None, ip, ua, ref, seen_at) for link_id, ip, ua, ref, seen_at in rows])
+                with self._lock:
+                    self.counters["unresolved"] += unresolved
+                raise
+
+            with self._lock:
+                self.counters["flushed"] += len(rows)
+                self.counters["unresolved"] += unresolved
+            return len(rows)
+
+    def flush_on_exit(self):
+        if self._pid != os.getpid():
+            return
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("LinkVisit flush on shutdown failed")
+
+recorder = VisitRecorder(
+    max_buffer=getattr(settings, "VISIT_BUFFER_SIZE", 10000),
+    batch_size=getattr(settings, "VISIT_FLUSH_BATCH", 500),
+    flush_interval=getattr(settings, "VISIT_FLUSH_INTERVAL", 2.0),
+)
+atexit.register(recorder.flush_on_exit)
+
+def record_preview(share_link_id: int):
+    """Count a link-preview crawler fetch (no page view, no session)."""
+    if getattr(settings, "VISIT_BUFFER_ENABLED", True):
+        recorder.record_preview(share_link_id)
+    else:
+        write_previews({share_link_id: 1})
+
+def record_visit(request, *, share_link_id: Optional[int] = None, token: Optional[str] = None,
+                 referer: Optional[str] = None):
+    """
+    Queue a page view for the given link id or token. With VISIT_BUFFER_ENABLED=False
+    (handy in tests / one-off scripts) it is written synchronously instead.
+    """
+    fields = {
+        "ip": request.META.get("REMOTE_ADDR"),
+        "user_agent": request.META.get("HTTP_USER_AGENT", ""),
+        "referer": referer or request.META.get("HTTP_REFERER", ""),
+    }
+    if getattr(settings, "VISIT_BUFFER_ENABLED", True):
+        recorder.record(share_link_id=share_link_id, token=token, **fields)
+        return
+    if not share_link_id:
+        share_link_id = ShareLink.objects.filter(token=token).values_list("id", flat=True).first()
+        if not share_link_id:
+            return
+    write_page_views([(share_link_id, fields["ip"], fields["user_agent"], fields["referer"], timezone.now())])
@@ -0,0 +1,109 @@
+// Patient portal service worker (rendered by sharing.views.service_worker).
+// The cache name carries the catalog + template version, so any content or
+// template change ships a new worker that drops the previous caches.
+"use strict";
+
+var CACHE = "pe-{{ version }}";
+// Registered with scope "/" (Service-Worker-Allowed) so that the WhatsApp entry
+// links /s/<token>/ are covered too; only these two trees are ever handled.
+var PAGES = [new URL("./", self.location).pathname, "{{ link_prefix }}"];   // /p/, /s/
+var STATIC = "{{ static_url }}";
+var SKIP = ["{{ beacon_url }}", self.location.pathname];
+var MAX_PAGES = 80;
+
+self.addEventListener("install", function () {
+  self.skipWaiting();
+});
+
+self.addEventListener("activate", function (event) {
+  event.waitUntil(
+    caches.keys().then(function (keys) {
+      return Promise.all(keys.filter(function (k) {
+        return k.indexOf("pe-") === 0 && k !== CACHE;
+      }).map(function (k) { return caches.delete(k); }));
+    }).then(function () { return self.clients.claim(); })
+  );
+});
+
+// Pages carry no per-patient data, so ?t= and other query strings share one entry.
+function pageKey(url) {
+  return url.origin + url.pathname;
+}
+
+function isPage(url) {
+  return PAGES.some(function (prefix) { return url.pathname.indexOf(prefix) === 0; });
+}
+
+function trim(cache) {
+  return cache.keys().then(function (keys) {
+    var pages = keys.filter(function (r) { return new URL(r.url).pathname.indexOf(STATIC) !== 0; });
+    if (pages.length > MAX_PAGES) {
+      return cache.delete(pages[0]).then(function () { return trim(cache); });
+    }
+  });
+}
+
+function refresh(cache, key) {
+  return fetch(key, {credentials: "same-origin"}).then(function (res) {
+    if (res.ok) {
+      return cache.put(key, res.clone()).then(function () { return trim(cache); }).then(function () { return res; });
+    }
+    if (res.status === 404 || res.status === 410) {
+      // Expired or removed link/page: stop serving the cached copy.
+      return cache.delete(key).then(function () { return res; });
+    }
+    return res;
+  });
+}
+
+self.addEventListener("fetch", function (event) {
+  var req = event.request;
+  if (req.method !== "GET") return;
+  var url = new URL(req.url);
+  if (url.origin !== self.location.origin || SKIP.indexOf(url.pathname) !== -1) return;
+
+  // App-shell assets: hashed file names, so cache-first.
+  if (url.pathname.indexOf(STATIC) === 0) {
+    event.respondWith(caches.open(CACHE).then(function (cache) {
+      return cache.match(req).then(function (hit) {
+        return hit || fetch(req).then(function (res) {
+          if (res.ok) cache.put(req, res.clone());
+          return res;
+        });
+      });
+    }));
+    return;
+  }
+
+  // Patient pages and entry links: stale-while-revalidate. Everything else
+  // under the "/" scope (admin, portal, ...) goes straight to the network.
+  if (!isPage(url)) return;
+  var key = pageKey(url);
+  event.respondWith(caches.open(CACHE).then(function (cache) {
+    return cache.match(key).then(function (hit) {
+      var network = refresh(cache, key);
+      if (hit) {
+        event.waitUntil(network.catch(function () {}));
+        return hit;
+      }
+      return network;
+    });
+  }));
+});
+
+// {type: "warm", urls: [...]}: pre-cache the clinic home (subtopic list) and the
+// current page, so the next visit from WhatsApp opens from the device.
+self.addEventListener("message", function (event) {
+  var data = event.data || {};
+  if (data.type !== "warm" || !Array.isArray(data.urls)) return;
+  event.waitUntil(caches.open(CACHE).then(function (cache) {
+    return Promise.all(data.urls.slice(0, 10).map(function (u) {
+      var url = new URL(u, self.location);
+      if (url.origin !== self.location.origin || !isPage(url)) return null;
+      var key = pageKey(url);
+      return cache.match(key).then(function (hit) {
+        return hit || refresh(cache, key).catch(function () {});
+      });
+    }));
+  }));
+});